@@ -2,6 +2,11 @@ import pandas as pd
 
 from libds.periods import compute_periods, dates_to_ordinal
 from .lab import compute_all_penias
-from .rc import compute_rc
-from .demo import add_exitus_info, add_age
-from .admission import get_admission, get_admission_id
\ No newline at end of file
+from .rc import compute_rc, compute_rc_cohort
+from .demo import add_exitus_info, add_age, add_exitus_infos, add_ages
+from .admission import get_admission, get_admission_id, get_admission_ids
+from .windows import EventWindows
+from .pipeline import EnrichmentPipeline
+from .parallel import parallel_enrich
+from .shared import SharedEvents
+from .cache import EnrichmentCache
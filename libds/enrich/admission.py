@@ -1,12 +1,14 @@
+import numpy as np
 import pandas as pd
-from libds.periods import find_interval_by_date
+from libds.periods import PatientIntervalIndex, find_interval_by_date
 
 def get_admission(df: pd.DataFrame, pid: int, _dt: pd.DatetimeTZDtype, strict: bool = True) -> pd.Series:
     """
     Find the admission that contains a given date for a given patient.
 
     Parameters:
-    df (pd.DataFrame): DataFrame containing the admission intervals with columns 'pid', 'start_dt', and 'end_dt'.
+    df (pd.DataFrame or PatientIntervalIndex): DataFrame containing the admission intervals with columns 'pid',
+        'start_dt', and 'end_dt', or an index built from it for repeated lookups.
     pid (int): Patient ID to search for.
     _dt (datetime): The date to find the interval for.
     
@@ -24,4 +26,35 @@ def get_admission_id(df: pd.DataFrame, pid: int, _dt: pd.DatetimeTZDtype, strict
     if res is None:
         return None
 
-    return res._id
\ No newline at end of file
+    return res._id
+
+
+def get_admission_ids(df_events: pd.DataFrame, df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
+    """
+    Find the admission that contains every event, in one vectorized pass.
+
+    Uses the same rules as get_admission_id, but events that are in no admission or in several
+    are reported in a mask instead of raising.
+
+    Parameters:
+    df_events (pd.DataFrame): Events with columns 'pid' and '_dt'.
+    df (pd.DataFrame or PatientIntervalIndex): DataFrame containing the admission intervals with columns 'pid',
+        'start_dt', 'end_dt' and '_id', or an index built from it.
+
+    Returns:
+    pd.Series: The admission _id of every event (aligned with df_events), NA where the mask is True.
+    pd.Series: True for events that are in no admission or in more than one.
+    """
+    index = df if isinstance(df, PatientIntervalIndex) else PatientIntervalIndex(df)
+
+    counts, first = index.search(df_events.pid.to_numpy(), df_events._dt)
+    mask = counts != 1
+    positions = np.full(len(counts), -1, dtype=np.int64)
+    positions[~mask] = index.rows[first[~mask]]
+
+    ids = index.df._id
+    if pd.api.types.is_integer_dtype(ids):
+        ids = ids.astype('Int64')
+    ids = pd.Series(ids.array.take(positions, allow_fill=True), index=df_events.index, name='admission_id')
+
+    return ids, pd.Series(mask, index=df_events.index)
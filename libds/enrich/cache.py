@@ -0,0 +1,155 @@
+import functools
+import threading
+import weakref
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from libds.periods import PatientIndex
+
+
+def fingerprint(df):
+    """
+    Content hash of a source table (a DataFrame or PatientIndex), including its index.
+
+    Returns:
+    int: Equal for tables with the same content.
+    """
+    if isinstance(df, PatientIndex):
+        df = df.df
+
+    hashes = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    # Order matters: mix the row position into every row hash
+    weights = np.arange(1, len(hashes) + 1, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+
+    return int(np.bitwise_xor.reduce(hashes * weights, initial=np.uint64(len(hashes))))
+
+
+def _freeze(value):
+    """Hashable version of a parameter (lists, dicts and arrays become tuples)."""
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple, np.ndarray, pd.Index)):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+
+class EnrichmentCache:
+    """
+    Opt-in LRU cache for windowed enrichment functions (compute_rc, compute_all_penias, get_diags, ...).
+
+    Results are keyed by (function, source table fingerprint, pid, window and other arguments), so
+    the same window is only computed once per source table content. The fingerprint of a table is
+    computed once and kept while the table object is alive: call invalidate(df) after modifying it
+    in place.
+
+    Parameters:
+    maxsize (int): Maximum number of results kept. The least recently used ones are evicted.
+        Defaults to 4096.
+
+    Example:
+    cache = EnrichmentCache(maxsize=100000)
+    compute_rc_cached = cache.wrap(compute_rc)
+    df_cohort.apply(lambda r: compute_rc_cached(df_rc, r.pid, r.start_dt, r.end_dt), axis=1)
+    """
+    def __init__(self, maxsize=4096):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        # id(table) -> (weakref to table, fingerprint), dropped when the table is garbage collected
+        self._fingerprints = dict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def stats(self):
+        """dict with the hits, misses, current size and maxsize."""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._results), 'maxsize': self.maxsize}
+
+    def fingerprint(self, df):
+        """Fingerprint of a source table, computed once per table object."""
+        with self._lock:
+            ref, value = self._fingerprints.get(id(df), (None, None))
+            if (ref is not None) and (ref() is df):
+                return value
+
+            value = fingerprint(df)
+            self._fingerprints[id(df)] = (weakref.ref(df, self._forget_callback(id(df))), value)
+            return value
+
+    def _forget_callback(self, key):
+        """Weakref callback dropping the fingerprint of a table when it is garbage collected."""
+        # Only the dict is captured, not the cache: tables do not keep it alive
+        fingerprints = self._fingerprints
+
+        def forget(ref):
+            # The id can already hold a newer table
+            if fingerprints.get(key, (None, None))[0] is ref:
+                del fingerprints[key]
+
+        return forget
+
+    def call(self, function, df, pid, *args, **kwargs):
+        """
+        Return function(df, pid, *args, **kwargs), computing it only if it is not cached.
+        Cached pandas objects and dicts are returned as copies, so callers can modify them.
+        """
+        # The function object itself: closures and partials with the same name get their own results
+        key = (function, self.fingerprint(df), pid, _freeze(args), _freeze(kwargs))
+
+        with self._lock:
+            if key in self._results:
+                self.hits += 1
+                self._results.move_to_end(key)
+                return self._copy(self._results[key])
+            self.misses += 1
+
+        result = function(df, pid, *args, **kwargs)
+
+        with self._lock:
+            self._results[key] = result
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+        return self._copy(result)
+
+    @staticmethod
+    def _copy(result):
+        return result.copy() if isinstance(result, (pd.Series, pd.DataFrame, dict)) else result
+
+    def wrap(self, function):
+        """function with the same signature (df, pid, ...) whose results are cached."""
+        @functools.wraps(function)
+        def cached(df, pid, *args, **kwargs):
+            return self.call(function, df, pid, *args, **kwargs)
+
+        return cached
+
+    def invalidate(self, df=None):
+        """
+        Forget cached results.
+
+        Parameters:
+        df (pd.DataFrame or PatientIndex): Source table that changed: its results and fingerprint
+            are dropped. If None, everything is dropped (statistics are kept).
+        """
+        with self._lock:
+            if df is None:
+                self._results.clear()
+                self._fingerprints.clear()
+                return
+
+            ref, value = self._fingerprints.pop(id(df), (None, None))
+            if (ref is None) or (ref() is not df):
+                return
+            for key in [key for key in self._results if key[1] == value]:
+                del self._results[key]
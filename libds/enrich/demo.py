@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def add_exitus_info(exitus_dt, ref_dt):
@@ -21,3 +22,49 @@ def add_age(birth_dt, ref_dt):
         return pd.Series()
 
     return pd.Series({'age': int((ref_dt - birth_dt).days/365.2425) })
+
+
+def add_exitus_infos(exitus_dt, ref_dt):
+    """
+    Column version of add_exitus_info, with datetime64 arithmetic instead of one Series per row.
+
+    Parameters:
+    exitus_dt (pd.Series): Exitus date of every row (NaT or None if alive).
+    ref_dt (pd.Series or datetime): Reference date of every row, or one for all rows.
+
+    Returns:
+    pd.DataFrame: exitus_days (Int64, <NA> where a date is missing), exitus_30d and exitus_60d
+        (False where a date is missing), indexed like exitus_dt.
+    pd.Series: Boolean mask of the rows with a missing date.
+    """
+    exitus_dt = pd.to_datetime(pd.Series(exitus_dt))
+    days = (exitus_dt - pd.to_datetime(ref_dt)).dt.days.astype('Int64')
+    missing = days.isna()
+
+    result = pd.DataFrame({
+        'exitus_days': days,
+        'exitus_30d': (days <= 30).fillna(False).astype(bool),
+        'exitus_60d': (days <= 60).fillna(False).astype(bool),
+    }, index=exitus_dt.index)
+
+    return result, missing
+
+
+def add_ages(birth_dt, ref_dt):
+    """
+    Column version of add_age. Missing birth dates are reported in a mask instead of printed.
+
+    Parameters:
+    birth_dt (pd.Series): Birth date of every row.
+    ref_dt (pd.Series or datetime): Reference date of every row, or one for all rows.
+
+    Returns:
+    pd.Series: Age in years (Int64, <NA> where a date is missing), named 'age'.
+    pd.Series: Boolean mask of the rows with a missing date.
+    """
+    birth_dt = pd.to_datetime(pd.Series(birth_dt))
+    days = (pd.to_datetime(ref_dt) - birth_dt).dt.days
+    # Truncated like int() in add_age
+    age = np.trunc(days / 365.2425).astype('Int64').rename('age')
+
+    return age, age.isna()
@@ -1,12 +1,36 @@
+import numpy as np
 import pandas as pd
+from scipy import sparse
+
+from libds.periods import PatientIndex
+from libds.periods.dates import day_offsets
+from .windows import EventWindows
 
 
 def prep_diags_df(df_diags):
-    df_diags = df_diags.copy()
-    df_diags['class'] = df_diags['class'].str.split(',')
-    df_diags = df_diags.explode('class').reset_index(drop=True)
-    df_diags['class'] = df_diags['class'].str.strip()
-    
+    """
+    One row per diagnosis class, splitting the comma-separated 'class' column.
+
+    Only the unique class strings are split and stripped. Rows are repeated once per class
+    of their string with a single take, and 'class' is returned as a categorical.
+    """
+    codes, uniques = pd.factorize(df_diags['class'])
+    parts = pd.Series(uniques, dtype=object).str.split(',')
+    part_codes, categories = pd.factorize(parts.explode().str.strip(), sort=True)
+
+    # Rows without a class keep a single row with a missing class, stored as one more unique
+    codes = np.where(codes >= 0, codes, len(uniques))
+    lengths = np.append(parts.str.len().to_numpy(dtype=np.int64), 1)
+    part_codes = np.append(part_codes, -1)
+    offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    row_lengths = lengths[codes]
+    rows = np.repeat(np.arange(len(codes)), row_lengths)
+    class_codes = part_codes[np.repeat(offsets[codes], row_lengths) + day_offsets(row_lengths)]
+
+    df_diags = df_diags.take(rows).reset_index(drop=True)
+    df_diags['class'] = pd.Categorical.from_codes(class_codes, categories=categories)
+
     return df_diags
 
 
@@ -21,11 +45,14 @@ def rename_cols(name, suffix):
 
 def get_diags(df_diags, pid, end_date, start_date=None, suffix=""):
     dft = df_diags
-    
-    cond = (dft.pid == pid) & (dft._dt <= end_date)
-    if start_date:
-        cond = cond & (dft._dt >= start_date)
-    dft = dft[cond]
+
+    if isinstance(dft, PatientIndex):
+        dft = dft.patient(pid, start_date if start_date else None, end_date)
+    else:
+        cond = (dft.pid == pid) & (dft._dt <= end_date)
+        if start_date:
+            cond = cond & (dft._dt >= start_date)
+        dft = dft[cond]
 
     result = pd.crosstab(dft['pid'], dft['class']).astype(bool).reset_index()
     if result.empty:
@@ -35,3 +62,61 @@ def get_diags(df_diags, pid, end_date, start_date=None, suffix=""):
     
     return result.iloc[0].rename(index=lambda r: rename_cols(r, suffix))
 
+
+def get_diags_cohort(df_diags, df_cohort, suffix="", start_col='start_dt', end_col='end_dt', as_matrix=False,
+                     classes=None):
+    """
+    Compute get_diags for every cohort row at once, as a sparse boolean (row x class) table.
+
+    Diagnoses are matched to the windows with EventWindows, the classes are factorized once and
+    the columns are renamed once.
+
+    Parameters:
+    df_diags (pd.DataFrame or EventWindows): Diagnoses, as returned by prep_diags_df, with columns
+        'pid', '_dt' and 'class', or an EventWindows of them by 'pid' to reuse its sort.
+    df_cohort (pd.DataFrame): Cohort windows with columns 'pid', `start_col` and `end_col`.
+    suffix (str): Suffix added to the column names, as in get_diags. Defaults to "".
+    start_col (str): Window start column. NaT starts, or None for the column, include all diagnoses
+        up to the end, as get_diags without start_date. Defaults to 'start_dt'.
+    end_col (str): Window end column. Defaults to 'end_dt'.
+    as_matrix (bool): If True, return a scipy sparse matrix and the column names instead of a DataFrame.
+        Defaults to False.
+    classes (list): Classes to use as columns, in order. Other classes are ignored. Defaults to the
+        classes found in any window, sorted.
+
+    Returns:
+    pd.DataFrame: Sparse boolean columns a_{class}{suffix}, one per class, indexed like df_cohort.
+    tuple: Only when as_matrix is True. A scipy.sparse.csr_matrix and the list of column names.
+    """
+    if isinstance(df_diags, EventWindows) and (df_diags.by != 'pid'):
+        raise ValueError("df_diags must be an EventWindows by 'pid'")
+    windows = EventWindows(df_diags, df_cohort, start_col=start_col, end_col=end_col)
+    rows, positions = windows.positions()
+
+    found = classes is None
+    if found:
+        codes, classes = pd.factorize(windows.events['class'], sort=True)
+    else:
+        classes = pd.Index(classes)
+        codes = classes.get_indexer(windows.events['class'])
+    codes = codes[positions]
+    # Diagnoses without a class (or not in classes) are not counted
+    rows, codes = rows[codes >= 0], codes[codes >= 0]
+
+    if found:
+        used, codes = np.unique(codes, return_inverse=True)
+        classes = classes.take(used)
+
+    pairs = np.unique(rows * len(classes) + codes)
+    matrix = sparse.csr_matrix(
+        (np.ones(len(pairs), dtype=bool), np.divmod(pairs, max(len(classes), 1))),
+        shape=(len(df_cohort), len(classes)),
+    )
+    columns = [rename_cols(name, suffix) for name in classes]
+
+    if as_matrix:
+        return matrix, columns
+
+    result = pd.DataFrame.sparse.from_spmatrix(matrix.astype(np.uint8), index=df_cohort.index, columns=columns)
+
+    return result.astype(pd.SparseDtype(bool, False))
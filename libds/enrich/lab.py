@@ -1,33 +1,120 @@
+import numpy as np
 import pandas as pd
 
-from libds.periods import compute_periods, dates_to_ordinal
+from libds.periods import (PatientIndex, compute_periods, compute_periods_grouped, dates_to_ordinal_with_values,
+                           dates_to_ordinal_grouped, fill_gaps)
+from .windows import EventWindows
+
+
+# (lab desc, threshold, prefix)
+PENIAS = [
+    ('Neutròfils', 0.5, 'neutropenia_'),
+    ('Neutròfils', 0.1, 'neutropenia_sever_'),
+    ('Limfòcits', 1, 'limfopenia_'),
+    ('Limfòcits', 0.5, 'limfopenia_sever_'),
+]
 
 
 def internal_compute_periods(df, pid, start_dt, end_dt, threshold, prefix):
-    selected_data = df[ (df.pid == pid) & (df._dt<=end_dt) & (df._dt>=start_dt) ]
+    if isinstance(df, PatientIndex):
+        selected_data = df.patient(pid, start_dt, end_dt)
+    else:
+        selected_data = df[ (df.pid == pid) & (df._dt<=end_dt) & (df._dt>=start_dt) ]
     if (len(selected_data)==0):
         return dict()
 
-    return compute_periods(
-        dates_to_ordinal(selected_data._dt),
-        (selected_data.value < threshold),
-        prefix = prefix
+    selected_data = selected_data.sort_values('_dt', kind='stable')
+    ordinals, states = dates_to_ordinal_with_values(
+        selected_data._dt,
+        (selected_data.value < threshold).to_numpy()
     )
+    # Days without a lab result are filled from their neighbours
+    _, states = fill_gaps(ordinals, states)
+
+    return compute_periods(states, prefix=prefix, as_array=True)
+
+
+def compute_all_penias(df, pid, start_dt, end_dt, penias=PENIAS):
+    if isinstance(df, PatientIndex):
+        df = df.patient(pid, start_dt, end_dt)
+
+    penias = pd.DataFrame(penias, columns=['desc', 'threshold', 'prefix'])
+    result = dict()
+    for desc, threshold, prefix in penias.itertuples(index=False):
+        result |= internal_compute_periods(df[df.desc == desc], pid, start_dt, end_dt, threshold, prefix)
+
+    return pd.Series(result)
+
+
+def compute_all_penias_cohort(df, df_cohort, return_periods=False, penias=PENIAS):
+    """
+    Compute the penia statistics of compute_all_penias for every cohort row at once.
+
+    The lab results of each analyte are matched to the cohort windows once, and all its
+    thresholds are evaluated as a (results x thresholds) boolean matrix. The matrix of every
+    analyte is flattened into one compute_periods_grouped call, grouped by (penia, cohort row).
+
+    Parameters:
+    df (pd.DataFrame or EventWindows): Lab results with columns 'pid', '_dt', 'desc' and 'value',
+        or an EventWindows of them by 'pid' to reuse its sort.
+    df_cohort (pd.DataFrame): Cohort windows with columns 'pid', 'start_dt' and 'end_dt'.
+    return_periods (bool): If True, also return the per-period tables. Defaults to False.
+    penias (list or pd.DataFrame): (desc, threshold, prefix) of every penia, or a DataFrame with
+        those columns. A lab value below the threshold counts as a penia day. Defaults to PENIAS.
+
+    Returns:
+    pd.DataFrame: days, periods and max_consec_days for every penia, indexed like df_cohort.
+        Rows without lab results in their window are NaN.
+    dict: Only when return_periods is True. Maps each penia prefix to a long table of periods,
+        with the cohort row position in the 'row' column.
+    """
+    penias = pd.DataFrame(penias, columns=['desc', 'threshold', 'prefix']).reset_index(drop=True)
+    if isinstance(df, EventWindows):
+        if df.by != 'pid':
+            raise ValueError("df must be an EventWindows by 'pid'")
+        windows = df.windows(df_cohort)
+    else:
+        labs = df.loc[df.desc.isin(penias.desc), ['pid', '_dt', 'desc', 'value']]
+        windows = EventWindows(labs, df_cohort)
+
+    rows, positions = windows.positions()
+    # Shared events can hold other lab results
+    used = windows.events.desc.isin(penias.desc).to_numpy()[positions]
+    data = windows.events.iloc[positions[used]].assign(row=rows[used])
+    n = len(df_cohort)
+
+    blocks = []
+    for desc, selected in penias.groupby('desc', sort=False):
+        matched = data[data.desc == desc]
+        ordinals = dates_to_ordinal_grouped(matched, 'row')
+        # One column per threshold of the analyte
+        states = matched.value.to_numpy()[:, None] < selected.threshold.to_numpy()[None, :]
+        blocks.append(pd.DataFrame({
+            'key': (selected.index.to_numpy()[None, :] * n + matched.row.to_numpy()[:, None]).ravel('F'),
+            'ordinal': np.tile(ordinals, len(selected)),
+            'state': states.ravel('F'),
+        }))
+
+    res = compute_periods_grouped(pd.concat(blocks), 'key', return_periods=return_periods)
+    if return_periods:
+        res, long = res
+        long_penia, long_row = np.divmod(long.pop('key').to_numpy(), n)
+        long.insert(0, 'row', long_row)
 
+    penia, row = np.divmod(res.index.to_numpy(), n)
+    results, periods = [], dict()
+    for i, prefix in enumerate(penias.prefix):
+        selected = res[penia == i]
+        selected.index = row[penia == i]
+        results.append(selected.add_prefix(prefix))
+        if return_periods:
+            selected = long[long_penia == i].reset_index(drop=True)
+            periods[prefix] = selected.rename(columns=lambda c: c if c == 'row' else prefix + c)
 
-def compute_all_penias(df, pid, start_dt, end_dt):
-    dft = df[df.desc == 'Neutròfils']
-    # neutropenia
-    res_neutropenia = internal_compute_periods(dft, pid, start_dt, end_dt, 0.5, 'neutropenia')
-    # neutropenia_sever
-    res_neutropenia_sever = internal_compute_periods(dft, pid, start_dt, end_dt, 0.1, 'neutropenia_sever')
+    result = pd.concat(results, axis=1).reindex(np.arange(n))
+    result.index = df_cohort.index
 
-    # limfocitopenia
-    dft = df[df.desc == 'Limfòcits']
-    res_limfocitopenia = internal_compute_periods(dft, pid, start_dt, end_dt, 1, 'limfopenia')
-    
-    # limfocitopenia_severa
-    dft = df[df.desc == 'Limfòcits']
-    res_limfocitopenia_sever = internal_compute_periods(dft, pid, start_dt, end_dt, 0.5, 'limfopenia_sever')
+    if return_periods:
+        return result, periods
 
-    return pd.Series(res_neutropenia | res_neutropenia_sever | res_limfocitopenia | res_limfocitopenia_sever)
+    return result
@@ -0,0 +1,202 @@
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .pipeline import EnrichmentPipeline
+from .shared import SharedEvents
+
+
+def patient_shards(pids, n_shards):
+    """
+    Shard of every patient, from a hash of its id that is the same in every process and run.
+
+    Parameters:
+    pids (array-like): Patient of every row.
+    n_shards (int): Number of shards.
+
+    Returns:
+    np.ndarray: Shard (0 to n_shards - 1) of every row.
+    """
+    hashes = pd.util.hash_array(np.asarray(pids))
+
+    return (hashes % np.uint64(n_shards)).astype(np.int64)
+
+
+def _row_shards(values, patients):
+    """
+    Shard of every row from the shard of its patient in the cohort, or -1 for other patients.
+    Patients are matched with get_indexer, as the serial functions match them (1 and 1.0 are the same).
+    """
+    codes = patients.index.get_indexer(values)
+
+    return np.where(codes >= 0, patients.to_numpy()[np.maximum(codes, 0)], -1)
+
+
+def _shard_order(shards, n_shards):
+    """Rows sorted by shard (in their order inside a shard), and the first row of every shard."""
+    order = np.argsort(shards, kind='stable')
+    # Rows of other patients (-1) sort first and are left out
+    offsets = np.searchsorted(shards[order], np.arange(n_shards + 1))
+
+    return order, offsets
+
+
+def _split(df, by, patients, n_shards):
+    """
+    Rows of df in every shard, or df itself for every shard if it has no patient column.
+    Rows of patients that are not in the cohort are left out.
+    """
+    if by not in df.columns:
+        return [df] * n_shards
+
+    order, offsets = _shard_order(_row_shards(df[by], patients), n_shards)
+
+    return [df.iloc[order[offsets[i]:offsets[i + 1]]] for i in range(n_shards)]
+
+
+class _SharedShard:
+    """
+    Rows of a shard in SharedEvents: positions lo to hi of the shard-sorted row order, which is
+    also in shared memory. Pickling it only sends block names and two ints.
+    """
+    def __init__(self, events, order, lo, hi):
+        self.events, self.order = events, order
+        self.lo, self.hi = lo, hi
+
+    def to_frame(self):
+        return self.events.to_frame(self.order.arrays['row'][self.lo:self.hi])
+
+
+def _split_shared(df, by, patients, n_shards):
+    """
+    _split for SharedEvents. The shard of every row is computed once here, and the rows sorted by
+    shard are stored in a new SharedEvents, so workers only slice their range.
+
+    Returns:
+    list: _SharedShard of every shard (or df itself if it has no patient column).
+    SharedEvents: The shard-sorted row order, to unlink when the workers are done (or None).
+    """
+    if by not in df.columns:
+        return [df] * n_shards, None
+
+    if by in df.categories:
+        # Shards of the categories, taken by code (-1 for missing ids)
+        shards = np.append(_row_shards(df.categories[by], patients), -1)[df.arrays[by]]
+    else:
+        shards = _row_shards(df.values(by), patients)
+    order, offsets = _shard_order(shards, n_shards)
+    order = SharedEvents(pd.DataFrame({'row': order}))
+
+    return [_SharedShard(df, order, offsets[i], offsets[i + 1]) for i in range(n_shards)], order
+
+
+def _shard_sources(sources):
+    """Sources of a shard, with the rows of SharedEvents copied from shared memory."""
+    result = dict()
+    for name, df in sources.items():
+        if isinstance(df, (SharedEvents, _SharedShard)):
+            df = df.to_frame()
+        result[name] = df
+
+    return result
+
+
+def _run_shard(function, df_cohort, sources, cohort_arg, params):
+    return function(**{cohort_arg: df_cohort}, **_shard_sources(sources), **params)
+
+
+def _run_pipeline_shard(specs, df_cohort, sources):
+    return EnrichmentPipeline(specs, _shard_sources(sources)).run(df_cohort)
+
+
+def parallel_enrich(function, df_cohort, sources=None, cohort_arg='df_cohort', max_workers=None,
+                    shard_size=10000, by='pid', **params):
+    """
+    Run a cohort-level enrich function on patient shards in a process pool.
+
+    The cohort is split by a hash of the patient, and every source row goes to the shard of its
+    patient in the cohort, so each worker only receives the rows of its patients. The results are put back in the cohort row order, and are
+    the same as running the function on the whole cohort, as long as every row only depends on
+    the events of its patient and the function returns the same columns for any cohort.
+
+    Parameters:
+    function (callable or EnrichmentPipeline): Function called with the cohort shard as `cohort_arg`,
+        the source shards as keyword arguments and params, returning a DataFrame or Series indexed
+        like the cohort shard (e.g. compute_rc_cohort). It must be picklable (defined at module level).
+        An EnrichmentPipeline is run with its own sources.
+    df_cohort (pd.DataFrame): Cohort rows with column `by`.
+    sources (dict): Source tables by argument name. Tables without column `by` are sent whole
+        to every shard. SharedEvents are not pickled: the shard of their rows is computed once
+        here, the rows sorted by shard are shared too, and each worker copies its contiguous range
+        from shared memory. Defaults to the sources of an EnrichmentPipeline, or no sources.
+    cohort_arg (str): Argument name of the cohort. Defaults to 'df_cohort'.
+    max_workers (int): Number of processes. Defaults to the number of CPUs.
+    shard_size (int): Approximate number of cohort rows per shard. Defaults to 10000.
+    by (str): Patient column. Defaults to 'pid'.
+    **params: Other keyword arguments passed to the function.
+
+    Returns:
+    pd.DataFrame or pd.Series: The function result for every cohort row, indexed like df_cohort.
+    """
+    pipeline = isinstance(function, EnrichmentPipeline)
+    if sources is None:
+        sources = function.sources if pipeline else dict()
+
+    n_shards = max(1, math.ceil(len(df_cohort) / shard_size))
+    pids = pd.Index(df_cohort[by].unique())
+    patients = pd.Series(patient_shards(pids, n_shards), index=pids)
+    # Row positions travel with the shards to restore the cohort order
+    cohort_shards = _split(df_cohort.assign(_position=np.arange(len(df_cohort))), by, patients, n_shards)
+
+    shards = [i for i in range(n_shards) if len(cohort_shards[i])]
+    max_workers = min(max_workers or os.cpu_count(), max(len(shards), 1))
+
+    source_shards, orders = dict(), []
+    try:
+        for name, df in sources.items():
+            if isinstance(df, SharedEvents):
+                source_shards[name], order = _split_shared(df, by, patients, n_shards)
+                orders.append(order)
+            else:
+                source_shards[name] = _split(df, by, patients, n_shards)
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = []
+            for i in shards:
+                shard = cohort_shards[i]
+                shard_position = shard.pop('_position').to_numpy()
+                shard_sources = {name: tables[i] for name, tables in source_shards.items()}
+                if pipeline:
+                    future = executor.submit(_run_pipeline_shard, function.specs, shard, shard_sources)
+                else:
+                    future = executor.submit(_run_shard, function, shard, shard_sources, cohort_arg, params)
+                futures.append((shard_position, future))
+
+            results = []
+            for shard_position, future in futures:
+                result = future.result()
+                result.index = shard_position
+                results.append(result)
+    finally:
+        for order in orders:
+            if order is not None:
+                order.close()
+                order.unlink()
+
+    if not results:
+        if pipeline:
+            return _run_pipeline_shard(function.specs, df_cohort, sources)
+        return _run_shard(function, df_cohort, sources, cohort_arg, params)
+
+    columns = [tuple(result.columns) for result in results if isinstance(result, pd.DataFrame)]
+    if len(set(columns)) > 1:
+        raise ValueError("Shards returned different columns, the function output must not depend on the "
+                         "cohort rows (e.g. pass classes to get_diags_cohort)")
+
+    result = pd.concat(results).sort_index()
+    result.index = df_cohort.index
+
+    return result
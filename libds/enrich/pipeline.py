@@ -0,0 +1,136 @@
+import pandas as pd
+
+from .admission import get_admission_ids
+from .demo import add_ages, add_exitus_infos
+from .diagnostics import get_diags_cohort
+from .lab import PENIAS, compute_all_penias_cohort
+from .rc import RCS_MAX, RCS_MIN, compute_rc_cohort
+from .windows import EventWindows
+
+
+def _patient_column(df_cohort, source, column):
+    """A column of the cohort, or of a per-patient source table (one row per 'pid') if given."""
+    if source is None:
+        return df_cohort[column]
+
+    values = source.drop_duplicates('pid').set_index('pid')[column]
+    return df_cohort['pid'].map(values)
+
+
+def _admission(df_cohort, source, dt_col='start_dt'):
+    events = pd.DataFrame({'pid': df_cohort['pid'], '_dt': df_cohort[dt_col]}, index=df_cohort.index)
+    ids, _ = get_admission_ids(events, source)
+
+    return ids.to_frame()
+
+
+def _rc(df_cohort, source, rc_max=RCS_MAX, rc_min=RCS_MIN):
+    return compute_rc_cohort(source, df_cohort, rc_max, rc_min)
+
+
+def _penias(df_cohort, source, penias=PENIAS):
+    return compute_all_penias_cohort(source, df_cohort, penias=penias)
+
+
+def _diags(df_cohort, source, suffix="", start_col='start_dt', end_col='end_dt', classes=None):
+    return get_diags_cohort(source, df_cohort, suffix, start_col, end_col, classes=classes)
+
+
+def _age(df_cohort, source, birth_col='birth_dt', ref_col='start_dt'):
+    age, _ = add_ages(_patient_column(df_cohort, source, birth_col), df_cohort[ref_col])
+
+    return age.to_frame()
+
+
+def _exitus(df_cohort, source, exitus_col='exitus_dt', ref_col='start_dt'):
+    result, _ = add_exitus_infos(_patient_column(df_cohort, source, exitus_col), df_cohort[ref_col])
+
+    return result
+
+
+# name -> function(df_cohort, source, **params) returning a DataFrame indexed like df_cohort
+ENRICHMENTS = {
+    'admission': _admission,
+    'rc': _rc,
+    'penias': _penias,
+    'diags': _diags,
+    'age': _age,
+    'exitus': _exitus,
+}
+
+# name -> columns an enrichment sorts its source by, for the ones that match it to cohort windows
+WINDOWED = {
+    'rc': ['pid', 'type'],
+    'penias': 'pid',
+    'diags': 'pid',
+}
+
+
+class EnrichmentPipeline:
+    """
+    Declarative feature table: a list of enrichment specs run over a whole cohort at once.
+
+    Every spec is run by a cohort-level function (compute_rc_cohort, compute_all_penias_cohort,
+    get_diags_cohort, ...), so each source table is matched to all cohort windows at once instead
+    of being filtered once per row by df.apply. The events of a source are sorted once per run
+    (an EventWindows per source and sort columns), and every spec that uses them (e.g. diagnoses
+    before and during the window) only adds its windows with binary searches. Specs are not merged:
+    each one still aggregates the events of its own windows.
+
+    Parameters:
+    specs (list): (enrichment, source, params) of every spec. enrichment is a key of ENRICHMENTS
+        or a function(df_cohort, source, **params) returning a DataFrame indexed like df_cohort.
+        source is a key of sources, or None for enrichments that only use cohort columns.
+        params is a dict of keyword arguments (optional).
+    sources (dict): Source tables by name.
+
+    Example:
+    pipeline = EnrichmentPipeline([
+        ('admission', 'admissions', {}),
+        ('rc', 'rc', {}),
+        ('penias', 'lab', {}),
+        ('diags', 'diags', {'suffix': '_prev', 'start_col': None}),
+        ('age', 'patients', {}),
+    ], sources)
+    df_features = pipeline.run(df_cohort)
+    """
+    def __init__(self, specs, sources=None):
+        self.specs = [tuple(spec) + ({},) * (3 - len(spec)) for spec in specs]
+        self.sources = dict() if sources is None else sources
+
+        for enrichment, source, _ in self.specs:
+            if not callable(enrichment) and enrichment not in ENRICHMENTS:
+                raise ValueError(f"Unknown enrichment {enrichment}")
+            if (source is not None) and (source not in self.sources):
+                raise ValueError(f"Unknown source {source}")
+
+    def run(self, df_cohort):
+        """
+        Compute every spec for the cohort.
+
+        Parameters:
+        df_cohort (pd.DataFrame): Cohort rows with 'pid' and the window/date columns the specs use.
+
+        Returns:
+        pd.DataFrame: The columns of every spec, in spec order, indexed like df_cohort.
+        """
+        results = []
+        # (source, sort columns) -> EventWindows with the sorted events, shared by the specs
+        indexes = dict()
+        for enrichment, source, params in self.specs:
+            function = enrichment if callable(enrichment) else ENRICHMENTS[enrichment]
+            table = None if source is None else self.sources[source]
+
+            by = None if callable(enrichment) else WINDOWED.get(enrichment)
+            if (by is not None) and (table is not None):
+                key = (source, str(by))
+                if key not in indexes:
+                    indexes[key] = EventWindows(table, by=by)
+                table = indexes[key]
+
+            results.append(function(df_cohort, table, **params))
+
+        if not results:
+            return pd.DataFrame(index=df_cohort.index)
+
+        return pd.concat(results, axis=1)
@@ -1,15 +1,22 @@
+import numpy as np
 import pandas as pd
 
+from libds.periods import PatientIndex
+from .windows import EventWindows
+
 
 RCS_MAX = "TEMP_AXI FC FREC_RESP".split()
 RCS_MIN = "PULSIOX".split()
 
-def compute_rc(df_rc, pid, start_dt, end_dt, rc_max, rc_min):
-    rc_subset = df_rc[
-        (df_rc.pid == pid)
-        & (df_rc._dt >= start_dt)
-        & (df_rc._dt <= end_dt)
-    ]
+def compute_rc(df_rc, pid, start_dt, end_dt, rc_max=RCS_MAX, rc_min=RCS_MIN):
+    if isinstance(df_rc, PatientIndex):
+        rc_subset = df_rc.patient(pid, start_dt, end_dt)
+    else:
+        rc_subset = df_rc[
+            (df_rc.pid == pid)
+            & (df_rc._dt >= start_dt)
+            & (df_rc._dt <= end_dt)
+        ]
 
     rcs_max =   {
                 f"{rc}_max": rc_subset.loc[rc_subset.type == rc, 'value'].max() for rc in rc_max
@@ -18,4 +25,51 @@ def compute_rc(df_rc, pid, start_dt, end_dt, rc_max, rc_min):
                 f"{rc}_min": rc_subset.loc[rc_subset.type == rc, 'value'].min() for rc in rc_min
                 }
 
-    return pd.Series(rcs_max | rcs_min)
\ No newline at end of file
+    return pd.Series(rcs_max | rcs_min)
+
+
+def compute_rc_cohort(df_rc, df_cohort, rc_max=RCS_MAX, rc_min=RCS_MIN):
+    """
+    Compute the compute_rc statistics for every cohort row at once.
+
+    The vital signs are sorted once by (pid, type, _dt), and every (row, type) window is
+    aggregated with a single reduceat, instead of filtering df_rc per row and sign.
+
+    Parameters:
+    df_rc (pd.DataFrame or EventWindows): Vital signs with columns 'pid', '_dt', 'type' (str or
+        categorical) and 'value', or an EventWindows of them by ['pid', 'type'] to reuse its sort.
+    df_cohort (pd.DataFrame): Cohort windows with columns 'pid', 'start_dt' and 'end_dt'.
+    rc_max (list): Types whose maximum is computed. Defaults to RCS_MAX.
+    rc_min (list): Types whose minimum is computed. Defaults to RCS_MIN.
+
+    Returns:
+    pd.DataFrame: Columns f"{rc}_max" and f"{rc}_min", indexed like df_cohort. NaN where a window
+        has no value of the type.
+    """
+    types = list(rc_max) + list(rc_min)
+    if isinstance(df_rc, EventWindows):
+        if list(np.atleast_1d(df_rc.by)) != ['pid', 'type']:
+            raise ValueError("df_rc must be an EventWindows by ['pid', 'type']")
+    else:
+        # Only the vital signs that are used
+        df_rc = df_rc.loc[df_rc.type.isin(types), ['pid', '_dt', 'type', 'value']]
+
+    n = len(df_cohort)
+    windows = pd.DataFrame({
+        'pid': np.tile(df_cohort['pid'].to_numpy(), len(types)),
+        'type': np.repeat(np.asarray(types, dtype=object), n),
+        'start_dt': np.tile(df_cohort['start_dt'].to_numpy(), len(types)),
+        'end_dt': np.tile(df_cohort['end_dt'].to_numpy(), len(types)),
+    })
+    windows = EventWindows(df_rc, windows, by=['pid', 'type'])
+    values = windows.events['value'].to_numpy(dtype=np.float64)
+
+    # Window blocks are in types order: the rc_max blocks first, then the rc_min ones
+    split = len(rc_max) * n
+    maxs = windows.reduce(values, np.fmax)[:split].reshape(len(rc_max), n)
+    mins = windows.reduce(values, np.fmin)[split:].reshape(len(rc_min), n)
+
+    result = {f"{rc}_max": maxs[i] for i, rc in enumerate(rc_max)}
+    result |= {f"{rc}_min": mins[i] for i, rc in enumerate(rc_min)}
+
+    return pd.DataFrame(result, index=df_cohort.index)
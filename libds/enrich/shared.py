@@ -0,0 +1,153 @@
+import sys
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+
+def _attach(name):
+    if sys.version_info >= (3, 13):
+        # Only the creator unlinks the block
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    return shared_memory.SharedMemory(name=name)
+
+
+class SharedEvents:
+    """
+    Event columns stored in multiprocessing.shared_memory blocks, for sending to worker processes.
+
+    Every column is stored as one NumPy array: numbers as they are, dates as int64 nanoseconds, and
+    categorical or other columns as int32 codes (the categories are kept aside, they are small).
+    Pickling a SharedEvents only sends the block names, and unpickling it in a worker gives
+    read-only views of the same memory, so memory stays flat as workers are added.
+
+    The process that builds it owns the blocks: use it as a context manager, or call close() and
+    unlink() when the workers are done.
+
+    Parameters:
+    df (pd.DataFrame): Events.
+    columns (list): Columns to share. Defaults to all columns.
+
+    Attributes:
+    arrays (dict): Read-only NumPy array of every column.
+    categories (dict): Categories (pd.Index) of the columns stored as codes.
+    """
+    def __init__(self, df, columns=None):
+        columns = list(df.columns) if columns is None else list(columns)
+        self._owner = True
+        self._blocks = dict()
+        self._meta = dict()
+        self.categories = dict()
+
+        try:
+            for column in columns:
+                values, kind, extra = self._encode(df[column])
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                self._blocks[column] = block
+                np.ndarray(values.shape, values.dtype, buffer=block.buf)[:] = values
+                self._meta[column] = (block.name, values.dtype.str, len(values), kind, extra)
+        except BaseException:
+            self.close()
+            self.unlink()
+            raise
+
+        self._views()
+
+    @staticmethod
+    def _encode(series):
+        """Array, kind and extra information (dtype or categories) to store a column."""
+        dtype = series.dtype
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            values = pd.DatetimeIndex(series).as_unit('ns').asi8
+            return values, 'datetime', str(getattr(dtype, 'tz', None) or '')
+        if isinstance(dtype, np.dtype) and (dtype.kind in 'biuf'):
+            return series.to_numpy(), 'number', None
+
+        categorical = isinstance(dtype, pd.CategoricalDtype)
+        codes, uniques = pd.factorize(series)
+        if categorical:
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        return codes.astype(np.int32), 'category' if categorical else 'codes', pd.Index(uniques)
+
+    def _views(self):
+        self.arrays = dict()
+        for column, (_, dtype, length, kind, extra) in self._meta.items():
+            array = np.ndarray((length,), np.dtype(dtype), buffer=self._blocks[column].buf)
+            array.flags.writeable = False
+            self.arrays[column] = array
+            if kind in ('category', 'codes'):
+                self.categories[column] = extra
+
+    def __getstate__(self):
+        return {'meta': self._meta}
+
+    def __setstate__(self, state):
+        self._owner = False
+        self._meta = state['meta']
+        self._blocks = {column: _attach(meta[0]) for column, meta in self._meta.items()}
+        self.categories = dict()
+        self._views()
+
+    def __len__(self):
+        return next(iter(self._meta.values()))[2] if self._meta else 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+        if self._owner:
+            self.unlink()
+
+    @property
+    def columns(self):
+        return list(self._meta)
+
+    def _decode(self, column, rows=None):
+        """Values of a column (or some rows) with its original dtype."""
+        _, _, _, kind, extra = self._meta[column]
+        array = self.arrays[column] if rows is None else self.arrays[column][rows]
+
+        if kind == 'datetime':
+            dates = pd.DatetimeIndex(array.view('M8[ns]'))
+            return dates.tz_localize('UTC').tz_convert(extra) if extra else dates
+        if kind == 'category':
+            return pd.Categorical.from_codes(array, categories=extra)
+        if kind == 'codes':
+            return pd.Series(pd.Categorical.from_codes(array, categories=extra)).astype(extra.dtype).array
+
+        return array
+
+    def values(self, column):
+        """Values of a column as they were in the DataFrame (codes are mapped back to their categories)."""
+        return self._decode(column)
+
+    def to_frame(self, rows=None):
+        """
+        Copy the events (or some rows) into a DataFrame with the original dtypes.
+
+        Parameters:
+        rows (array-like of int or bool): Rows to take. Defaults to all rows.
+
+        Returns:
+        pd.DataFrame: The events, with a RangeIndex.
+        """
+        result = {column: self._decode(column, rows) for column in self._meta}
+
+        # Numeric columns are copied, the shared views stay read-only
+        return pd.DataFrame(result, copy=True)
+
+    def close(self):
+        """Release the views of this process."""
+        self.arrays = dict()
+        for block in self._blocks.values():
+            block.close()
+
+    def unlink(self):
+        """Free the shared memory (only the process that created it can)."""
+        if not self._owner:
+            raise ValueError("Only the process that created the shared memory can unlink it")
+        for block in self._blocks.values():
+            block.unlink()
+        self._blocks = dict()
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+
+from libds.periods.dates import day_offsets
+from libds.periods.index import GroupedTimes, PatientIndex
+
+
+def _groups(df, by):
+    """Group of every row: a column, or a pd.MultiIndex for several columns."""
+    if isinstance(by, str):
+        return df[by].to_numpy()
+
+    return pd.MultiIndex.from_frame(df[list(by)])
+
+
+class EventWindows:
+    """
+    The events of every cohort window, as offset ranges into the events sorted by patient and date.
+
+    Events are sorted once, and every window is found with two binary searches, so enrichers can
+    aggregate over the ranges instead of filtering the whole event table for each cohort row.
+    The sorted events can be shared by several sets of windows: build the EventWindows without
+    a cohort, then pass it as df_events (or call windows()) for every cohort and window columns.
+
+    Parameters:
+    df_events (pd.DataFrame, PatientIndex or EventWindows): Events with columns `by` and `dt_col`.
+        The sorted events (and `by`) of an EventWindows are reused without sorting them again.
+    df_cohort (pd.DataFrame): Windows with columns `by`, `start_col` and `end_col`. If None, the
+        events are only sorted and there are no windows. Defaults to None.
+    by (str or list): Column(s) matching events to windows. Defaults to 'pid'.
+    start_col (str): Window start column (inclusive), where NaT or None starts are unbounded.
+        If None, every window starts with the first event of its group. Defaults to 'start_dt'.
+    end_col (str): Window end column (inclusive). Defaults to 'end_dt'.
+    dt_col (str): Event date column. Defaults to '_dt'.
+
+    Attributes:
+    events (pd.DataFrame): The events with a date, sorted by `by` and date (ties keep their order).
+    times (GroupedTimes): Binary search over the sorted events.
+    by (str or list): Column(s) matching events to windows.
+    lo, hi (np.ndarray): First and last + 1 position in events of every window.
+    index (pd.Index): Index of df_cohort.
+    """
+    def __init__(self, df_events, df_cohort=None, by='pid', start_col='start_dt', end_col='end_dt', dt_col='_dt'):
+        if isinstance(df_events, EventWindows):
+            self.events, self.times, self.by = df_events.events, df_events.times, df_events.by
+        else:
+            if isinstance(df_events, PatientIndex):
+                df_events = df_events.df
+            # Events without a date never fall in a window
+            df_events = df_events[df_events[dt_col].notna()]
+            self.times = GroupedTimes(_groups(df_events, by), df_events[dt_col])
+            self.events = df_events.iloc[self.times.order]
+            self.by = by
+
+        if df_cohort is None:
+            self.index = pd.RangeIndex(0)
+            self.lo = self.hi = np.zeros(0, dtype=np.int64)
+            return
+
+        self.index = df_cohort.index
+        groups = _groups(df_cohort, self.by)
+        self.hi = self.times.search(groups, df_cohort[end_col], 'right')
+        if start_col is None:
+            self.lo = self.times.bounds(groups)[0]
+        else:
+            # NaT sorts before every date, so it starts at the first event of the group
+            self.lo = self.times.search(groups, df_cohort[start_col], 'left')
+        self.lo = np.minimum(self.lo, self.hi)
+
+    def windows(self, df_cohort, start_col='start_dt', end_col='end_dt'):
+        """Other windows over the same sorted events, without sorting them again."""
+        return EventWindows(self, df_cohort, start_col=start_col, end_col=end_col)
+
+    def __len__(self):
+        return len(self.lo)
+
+    @property
+    def lengths(self):
+        """Number of events in every window."""
+        return self.hi - self.lo
+
+    def ranges(self):
+        """pd.DataFrame with the 'lo' and 'hi' offsets of every window, indexed like df_cohort."""
+        return pd.DataFrame({'lo': self.lo, 'hi': self.hi}, index=self.index)
+
+    def positions(self):
+        """
+        Window and event position of every (window, event) match, sorted by window and date.
+
+        Returns:
+        tuple: Window positions in df_cohort and event positions in events.
+        """
+        lengths = self.lengths
+        windows = np.repeat(np.arange(len(lengths)), lengths)
+
+        return windows, np.repeat(self.lo, lengths) + day_offsets(lengths)
+
+    def take(self, row_col='row'):
+        """
+        The events of every window, one row per match, with the window position in `row_col`.
+        Windows that overlap repeat their shared events.
+        """
+        windows, positions = self.positions()
+        result = self.events.iloc[positions]
+
+        return result.assign(**{row_col: windows})
+
+    def reduce(self, values, ufunc, fill=np.nan):
+        """
+        Aggregate a value of the events over every window with a ufunc (e.g. np.fmax).
+
+        Parameters:
+        values (str or array-like): Column of events, or values aligned with events.
+        ufunc (np.ufunc): Reduction applied with reduceat.
+        fill: Result of empty windows. Defaults to NaN.
+
+        Returns:
+        np.ndarray: One value per window.
+        """
+        if isinstance(values, str):
+            values = self.events[values].to_numpy()
+        values = np.asarray(values)
+
+        lengths = self.lengths
+        _, positions = self.positions()
+        nonempty = lengths > 0
+        # Offsets of the non-empty windows in the concatenated values
+        offsets = np.concatenate(([0], np.cumsum(lengths[nonempty])[:-1]))
+
+        result = np.full(len(lengths), fill, dtype=np.result_type(values.dtype, np.asarray(fill).dtype))
+        if len(positions):
+            result[nonempty] = ufunc.reduceat(values[positions], offsets)
+
+        return result
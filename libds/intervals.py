@@ -1,4 +1,14 @@
+import numpy as np
+import pandas as pd
+
+from libds.periods.index import PatientIntervalIndex
+
+
 def intervals_select_by_interval(df, pid, start_dt, end_dt, contained=False):
+    if isinstance(df, PatientIntervalIndex):
+        _, rows = df.overlaps([pid], [start_dt], [end_dt], contained)
+        return df.df.iloc[np.sort(rows)]
+
     if contained:
         return df[(df.pid == pid) & (df['start_dt'] >= start_dt) & (df['end_dt'] <= end_dt  )]
     else:
@@ -8,3 +18,27 @@ def intervals_select_by_interval(df, pid, start_dt, end_dt, contained=False):
 def contains_interval(df, pid, start_dt, end_dt, contained=False):
     res = intervals_select_by_interval(df, pid, start_dt, end_dt, contained)
     return res.shape[0] > 0
+
+
+def overlap_join(left, right, contained=False):
+    """
+    Find all pairs of intervals of the same patient that overlap, without a cross product.
+
+    Parameters:
+    left (pd.DataFrame): Intervals with columns 'pid', 'start_dt' and 'end_dt'.
+    right (pd.DataFrame or PatientIntervalIndex): Intervals with the same columns, or an index built from them.
+    contained (bool): If True, only right intervals fully inside the left one match (as in
+        intervals_select_by_interval). Defaults to False.
+
+    Returns:
+    pd.DataFrame: Columns 'left' and 'right' with the index labels of every matching pair,
+        sorted by left row and then by right row.
+    """
+    index = right if isinstance(right, PatientIntervalIndex) else PatientIntervalIndex(right)
+    queries, rows = index.overlaps(left.pid.to_numpy(), left.start_dt, left.end_dt, contained)
+
+    order = np.lexsort((rows, queries))
+    return pd.DataFrame({
+        'left': left.index[queries[order]],
+        'right': index.df.index[rows[order]],
+    })
@@ -2,7 +2,8 @@ import pandas as pd
 from pandas.errors import OptionError
 from unidecode import unidecode
 
-from .find_closest_event import find_closest_event
+from .find_closest_event import find_closest_event, find_closest_events
+from .nearest_events import nearest_events
 from .drop_close_dates import drop_close_dates
 from .group import group
 
@@ -1,5 +1,11 @@
+import numpy as np
 import pandas as pd
 
+from libds.periods.index import GroupedTimes, PatientIndex, to_ns
+
+
+DAY_NS = 86400 * 10**9
+
 
 def find_closest_event(df, pid, _dt, inclusive=False, prefix=""):
     """
@@ -16,11 +22,14 @@ def find_closest_event(df, pid, _dt, inclusive=False, prefix=""):
             - f"{prefix}_": True if an event was found, False otherwise.
             - f"{prefix}_days": The number of days between the event and the given date.
     """
-    if inclusive:
-        date_cond = df._dt <= _dt
+    if isinstance(df, PatientIndex):
+        events = df.patient(pid, end_dt=_dt, inclusive=inclusive)
     else:
-        date_cond = df._dt < _dt
-    events = df[(df.pid == pid) & date_cond]
+        if inclusive:
+            date_cond = df._dt <= _dt
+        else:
+            date_cond = df._dt < _dt
+        events = df[(df.pid == pid) & date_cond]
 
     if len(events) == 0:
         return pd.Series({f"{prefix}_": False, f"{prefix}_days": None})
@@ -29,3 +38,37 @@ def find_closest_event(df, pid, _dt, inclusive=False, prefix=""):
     days = (_dt - event_dt).days
 
     return pd.Series({f"{prefix}_": True, f"{prefix}_days": days})
+
+
+def find_closest_events(df_ref, df, inclusive=False, prefix=""):
+    """
+    Find the closest previous event for every row of a reference DataFrame at once.
+    Column-level version of find_closest_event, with a backward binary search per patient.
+    Args:
+        df_ref (pd.DataFrame): The reference rows, with 'pid' and '_dt' columns.
+        df (pd.DataFrame): The DataFrame containing the events.
+        inclusive (bool): If True, events on the reference date are considered.
+        prefix (str): The prefix for the resulting columns.
+    Returns:
+        pd.DataFrame: Indexed like df_ref, with the same columns (and dtypes) that
+            df_ref.apply over find_closest_event gives:
+            - f"{prefix}_": True if an event was found, False otherwise.
+            - f"{prefix}_days": The number of days between the event and the given date.
+    """
+    pids = df_ref.pid.to_numpy()
+    times = to_ns(df_ref._dt)
+
+    # Events without a date are never before the reference date
+    df = df[df._dt.notna()]
+    events = GroupedTimes(df.pid.to_numpy(), df._dt)
+    lo, _ = events.bounds(pids)
+    last = events.search(pids, times, 'right' if inclusive else 'left') - 1
+    found = last >= lo
+
+    days = np.zeros(len(times), dtype=np.int64)
+    if len(events):
+        days = (times - events.times[np.clip(last, 0, None)]) // DAY_NS
+    if not found.all():
+        days = np.where(found, days, np.nan)
+
+    return pd.DataFrame({f"{prefix}_": found, f"{prefix}_days": days}, index=df_ref.index)
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from libds.periods.index import GroupedTimes, to_ns
+
+
+DAY_NS = 86400 * 10**9
+
+
+def nearest_events(df_ref, df, k=1, horizons=(7, 30, 90), inclusive=True, prefix=""):
+    """
+    For every reference row, find the k nearest events before and after its date and count
+    the events in several horizons before it.
+    All rows and horizons are answered with binary searches over per-patient sorted dates,
+    so each extra horizon costs one more search.
+    Args:
+        df_ref (pd.DataFrame): The reference rows, with 'pid' and '_dt' columns.
+        df (pd.DataFrame): The DataFrame containing the events, with 'pid' and '_dt' columns.
+        k (int): Number of events to report on each side.
+        horizons (iterable of int): Days before the reference date to count events in.
+        inclusive (bool): If True, events on the reference date count as previous events.
+        prefix (str): The prefix for the resulting columns.
+    Returns:
+        pd.DataFrame: Indexed like df_ref, with the columns:
+            - f"{prefix}_prev{i}_days": Days from the i-th previous event to the date (NaN if none).
+            - f"{prefix}_next{i}_days": Days from the date to the i-th next event (NaN if none).
+            - f"{prefix}_{h}d": Number of previous events within h days of the date.
+    """
+    pids = df_ref.pid.to_numpy()
+    times = to_ns(df_ref._dt)
+
+    # Events without a date are neither before nor after any date
+    df = df[df._dt.notna()]
+    events = GroupedTimes(df.pid.to_numpy(), df._dt)
+    lo, hi = events.bounds(pids)
+    # First position after the previous events of every row
+    split = events.search(pids, times, 'right' if inclusive else 'left')
+    last = max(len(events) - 1, 0)
+    event_times = events.times if len(events) else np.zeros(1, dtype=np.int64)
+
+    result = dict()
+    for i in range(1, k + 1):
+        prev = split - i
+        result[f"{prefix}_prev{i}_days"] = np.where(
+            prev >= lo, (times - event_times[np.clip(prev, 0, last)]) // DAY_NS, np.nan)
+    for i in range(1, k + 1):
+        following = split + i - 1
+        result[f"{prefix}_next{i}_days"] = np.where(
+            following < hi, (event_times[np.clip(following, 0, last)] - times) // DAY_NS, np.nan)
+
+    for horizon in horizons:
+        start = events.search(pids, times - horizon * DAY_NS, 'left')
+        result[f"{prefix}_{horizon}d"] = split - start
+
+    return pd.DataFrame(result, index=df_ref.index)
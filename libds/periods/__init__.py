@@ -1,14 +1,20 @@
-from .fill_gaps import fill_gaps
-from .compute_periods import compute_periods, delete_period, join_specific_periods, join_periods_by_distance
-from .dates import dates_to_ordinal, dates_to_ordinal_with_values, unify_dates, dates_fill_period
-from .get_closest_event import get_closest_event
+from .fill_gaps import fill_gaps, fill_gaps_grouped
+from .periods import Periods
+from .compute_periods import (compute_periods, compute_periods_grouped, delete_period, join_specific_periods,
+                              join_periods_by_distance, join_periods_by_distance_batch)
+from .dates import (dates_to_days, dates_to_ordinal, dates_to_ordinal_with_values, dates_to_ordinal_grouped, unify_dates,
+                    dates_fill_period, df_fill_period, expand_days)
+from .get_closest_event import get_closest_event, get_closest_events
+from .index import PatientIndex, PatientIntervalIndex
+from .from_intervals import compute_periods_from_intervals, compute_periods_from_intervals_grouped
 
 def find_interval_by_date(df, _dt, pid=None, strict=True):
     """
     Find the interval that contains a given date for a given patient.
 
     Parameters:
-    df (pd.DataFrame): DataFrame containing the intervals with columns 'pid', 'start_dt', and 'end_dt'.
+    df (pd.DataFrame or PatientIntervalIndex): DataFrame containing the intervals with columns 'pid', 'start_dt',
+        and 'end_dt', or an index built from it for repeated lookups.
     _dt (datetime): The date to find the interval for.
     pid (int or str): Patient ID to search for. If None, all patients are considered. Defaults to None.
     strict (bool): If True, asserts that exactly one interval is found. Defaults to True.
@@ -16,6 +22,9 @@ def find_interval_by_date(df, _dt, pid=None, strict=True):
     Returns:
     pd.Series: The row of the DataFrame that contains the interval with the given date for the specified patient.
     """
+    if isinstance(df, PatientIntervalIndex):
+        return df.find(_dt, pid, strict)
+
     if pid is None:
         res = df[(df.start_dt <= _dt) & (df.end_dt >= _dt)]
     else:
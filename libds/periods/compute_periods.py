@@ -1,55 +1,53 @@
-from copy import deepcopy
-
-def compute_periods(states, prefix="", interval_stats=True):
-    # State
-    prev_state = False
-    interval = 0
-    duration = 0
-    # Results
-    days = 0
-    periods = 0
-    intervals = []
-    durations = []
-    starts = []
-    ends = []
-
-
-    for i, curr_state in enumerate(states):
-        if prev_state:
-            if curr_state:
-                # Keeps True
-                days += 1
-                duration += 1
-            else:
-                # Switch to False
-                interval = 1
-                durations.append(duration)
-                ends.append(i-1)
-        else:
-            if curr_state:
-                # Switch to True
-                intervals.append(interval)
-                days += 1
-                periods += 1
-                duration = 1
-                starts.append(i)
-            else:
-                # Keeps False
-                interval += 1
-
-        prev_state = curr_state
-    
-    if curr_state:
-        durations.append(duration)
-        ends.append(i)
+import numpy as np
+import pandas as pd
+
+from .periods import Periods, merge_arrays
+
+
+def run_bounds(states):
+    """
+    Run-length encode a sequence of states.
+
+    Parameters:
+    states (list, np.ndarray or pd.Series): Truthy values mark the days inside a period.
+
+    Returns:
+    tuple: Two int arrays with the first and last index of every run of truthy values.
+    """
+    states = np.asarray(states, dtype=bool).ravel()
+    # Pad with False so every run has a rising and a falling edge
+    edges = np.diff(np.concatenate(([False], states, [False])).astype(np.int8))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1) - 1
+
+    return starts, ends
+
+
+def compute_periods(states, prefix="", interval_stats=True, as_array=False):
+    starts, ends = run_bounds(states)
+
+    return periods_dict(starts, ends, prefix, interval_stats, as_array)
+
+
+def periods_dict(starts, ends, prefix="", interval_stats=True, as_array=False):
+    """
+    Build the compute_periods result from the first and last day of every period.
+    """
+    durations = ends - starts + 1
+    # Days since the end of the previous period (or since the first day)
+    intervals = starts - np.concatenate(([-1], ends[:-1])) - 1
 
     result = {
-        prefix + 'days': days,
-        prefix + 'periods': periods,
-        prefix + 'max_consec_days': max(durations) if durations else 0,
+        prefix + 'days': int(durations.sum()),
+        prefix + 'periods': len(starts),
+        prefix + 'max_consec_days': int(durations.max()) if len(durations) else 0,
     }
 
     if interval_stats:
+        if not as_array:
+            intervals, durations = intervals.tolist(), durations.tolist()
+            starts, ends = starts.tolist(), ends.tolist()
+
         result |= {
             prefix + 'intervals': intervals,
             prefix + 'durations': durations,
@@ -60,44 +58,150 @@ def compute_periods(states, prefix="", interval_stats=True):
     return result
 
 
-def join_specific_periods(periods, n):
-    if (n<0) or (n>len(periods['intervals'])-2):
-        raise IndexError('period index out of range')
-    
-    periods = deepcopy(periods)
+def _update_periods(periods, new):
+    # Shallow copy: the arrays are rebuilt by Periods, other values are kept as they are
+    result = dict(periods)
+    as_array = isinstance(periods['intervals'], np.ndarray)
+    for key, value in new.to_dict(as_array=as_array).items():
+        if key in result:
+            result[key] = value
 
-    periods['periods'] -= 1
-    periods['durations'][n] += periods['durations'][n+1] + periods['intervals'][n+1]
-    del periods['intervals'][n+1]
-    del periods['durations'][n+1]
-    del periods['starts'][n+1]
-    del periods['ends'][n]
+    return result
 
-    return periods
 
+def join_specific_periods(periods, n):
+    if isinstance(periods, Periods):
+        return periods.join(n)
 
-def delete_period(periods, n):
-    len_periods = len(periods['intervals'])
-    if (n<0) or (n>len_periods-1):
-        raise IndexError('period index out of range')
-    
-    periods = deepcopy(periods)
+    return _update_periods(periods, Periods.from_dict(periods).join(n))
 
-    if (n+1) < len_periods:
-        periods['intervals'][n+1] += periods['intervals'][n] + periods['durations'][n]
-    del periods['intervals'][n]
-    del periods['durations'][n]
-    del periods['starts'][n]
-    del periods['ends'][n]
-    periods['periods'] -= 1
 
-    return periods
+def delete_period(periods, n):
+    if isinstance(periods, Periods):
+        return periods.delete(n)
 
+    return _update_periods(periods, Periods.from_dict(periods).delete(n))
 
 
 def join_periods_by_distance(periods, distance):
-    for i in range(len(periods['intervals'])-1, 0, -1):
-        if periods['intervals'][i] <= distance:
-            periods = join_specific_periods(periods, i-1)
-
-    return periods
\ No newline at end of file
+    if isinstance(periods, Periods):
+        return periods.join_by_distance(distance)
+
+    return _update_periods(periods, Periods.from_dict(periods).join_by_distance(distance))
+
+
+def join_periods_by_distance_batch(offsets, intervals, durations, starts, ends, distance):
+    """
+    Join periods closer than a distance for many patients in one vectorized call.
+
+    The periods of all patients are concatenated; patient i owns positions offsets[i] to offsets[i+1].
+
+    Parameters:
+    offsets (array-like of int): Start position of every patient, plus the total length at the end.
+    intervals, durations, starts, ends (array-like of int): Concatenated period arrays.
+    distance (int): Periods whose interval is at most distance are joined with the previous one.
+
+    Returns:
+    tuple: New offsets, intervals, durations, starts and ends.
+    """
+    offsets = np.asarray(offsets, dtype=np.int64)
+    intervals = np.asarray(intervals, dtype=np.int64)
+    durations = np.asarray(durations, dtype=np.int64)
+    starts = np.asarray(starts, dtype=np.int64)
+    ends = np.asarray(ends, dtype=np.int64)
+
+    # The first period of each patient is never joined to the previous patient
+    joined = intervals <= distance
+    joined[offsets[:-1][offsets[:-1] < len(joined)]] = False
+
+    new_offsets = np.concatenate(([0], np.cumsum(~joined)))[offsets]
+
+    return (new_offsets, *merge_arrays(joined, intervals, durations, starts, ends))
+
+
+def compute_periods_grouped(df, by='pid', ordinal_col='ordinal', state_col='state', prefix="",
+                            return_periods=False):
+    """
+    Compute period statistics for every group of a DataFrame in one vectorized pass.
+
+    Rows are sorted by `by` and `ordinal_col`, and only the first row of each day is used
+    (as dates_to_ordinal_with_values does). Days missing between two observations belong to a
+    period only if both neighbours are True (fill_gaps 'true_between' mode), so with dense
+    ordinals the result matches compute_periods run on each group.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame with one row per observation.
+    by (str): Column identifying the group (patient). Defaults to 'pid'.
+    ordinal_col (str): Column with the day ordinal of each observation. Defaults to 'ordinal'.
+    state_col (str): Column with the boolean state of each observation. Defaults to 'state'.
+    prefix (str): Prefix added to the statistic columns. Defaults to "".
+    return_periods (bool): If True, also return a long table with one row per period. Defaults to False.
+
+    Returns:
+    pd.DataFrame: One row per group (indexed by `by`) with days, periods and max_consec_days.
+    pd.DataFrame: Only when return_periods is True. One row per period with its group, number,
+        interval, duration, start and end. Starts and ends are relative to the first day of the group.
+    """
+    data = df[[by, ordinal_col, state_col]].sort_values([by, ordinal_col], kind='stable')
+    data = data.drop_duplicates([by, ordinal_col], keep='first')
+
+    codes, groups = pd.factorize(data[by], sort=True)
+    ordinals = data[ordinal_col].to_numpy(dtype=np.int64)
+    states = data[state_col].to_numpy(dtype=bool)
+
+    # A run starts (ends) on a True observation whose previous (next) one is False or another group
+    new_group = np.diff(codes, prepend=-1) != 0
+    last_of_group = np.diff(codes, append=-1) != 0
+    prev_state = np.concatenate(([False], states[:-1])) & ~new_group
+    next_state = np.concatenate((states[1:], [False])) & ~last_of_group
+    first_ordinal = ordinals[new_group][codes]
+
+    start_idx = np.flatnonzero(states & ~prev_state)
+    end_idx = np.flatnonzero(states & ~next_state)
+    run_group = codes[start_idx]
+    starts = ordinals[start_idx] - first_ordinal[start_idx]
+    ends = ordinals[end_idx] - first_ordinal[end_idx]
+
+    return periods_tables(groups, run_group, starts, ends, by, prefix, return_periods)
+
+
+def periods_tables(groups, run_group, starts, ends, by='pid', prefix="", return_periods=False):
+    """
+    Build the outputs of compute_periods_grouped from the runs of every group.
+
+    Parameters:
+    groups (pd.Index): Group values; run_group holds positions in it.
+    run_group (np.ndarray): Group of every run, sorted.
+    starts, ends (np.ndarray): First and last day of every run, relative to its group.
+    """
+    n_groups = len(groups)
+    durations = ends - starts + 1
+
+    first_run = np.diff(run_group, prepend=-1) != 0
+    prev_ends = np.where(first_run, -1, np.concatenate(([-1], ends[:-1])))
+    intervals = starts - prev_ends - 1
+
+    max_consec_days = np.zeros(n_groups, dtype=np.int64)
+    np.maximum.at(max_consec_days, run_group, durations)
+
+    index = pd.Index(groups, name=by)
+    result = pd.DataFrame({
+        prefix + 'days': np.bincount(run_group, weights=durations, minlength=n_groups).astype(np.int64),
+        prefix + 'periods': np.bincount(run_group, minlength=n_groups),
+        prefix + 'max_consec_days': max_consec_days,
+    }, index=index)
+
+    if not return_periods:
+        return result
+
+    run_start = np.flatnonzero(first_run)
+    periods = pd.DataFrame({
+        by: groups.take(run_group),
+        prefix + 'period': np.arange(len(run_group)) - run_start[np.cumsum(first_run) - 1],
+        prefix + 'interval': intervals,
+        prefix + 'duration': durations,
+        prefix + 'start': starts,
+        prefix + 'end': ends,
+    })
+
+    return result, periods
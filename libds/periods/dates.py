@@ -1,10 +1,36 @@
 from datetime import timedelta
 
+import numpy as np
+import pandas as pd
+
+
+def is_datetime64(datetimes):
+    """
+    Returns True for Series, Index or arrays with a datetime64 dtype (tz-aware or not).
+    """
+    return isinstance(datetimes, (pd.Series, pd.Index, np.ndarray)) and pd.api.types.is_datetime64_any_dtype(datetimes)
+
+
+def dates_to_days(datetimes):
+    """
+    Converts datetime64 values to days since 1970-01-01 using integer arithmetic.
+    Tz-aware values use the calendar day of their own time zone, as date() does.
+    """
+    datetimes = pd.DatetimeIndex(datetimes)
+    if datetimes.tz is not None:
+        datetimes = datetimes.tz_localize(None)
+
+    return datetimes.to_numpy().astype('datetime64[D]').astype(np.int64)
+
 
 def dates_to_ordinal(datetimes):
     """
     Converts a list of dates to a list of ordinal values.
     """
+    if is_datetime64(datetimes):
+        days = dates_to_days(datetimes)
+        return (days - days.min()).tolist()
+
     dates = [date.date() for date in datetimes]
     min_date = min(dates)
     ordinals = [(date - min_date).days for date in dates]
@@ -13,22 +39,43 @@ def dates_to_ordinal(datetimes):
 
 
 def dates_to_ordinal_with_values(datetimes, values, drop_duplicates=True):
-    ordinals = dates_to_ordinal(datetimes)
+    """
+    Converts dates to ordinals and keeps the values of the first date of each day.
+    Values are taken by position; extra dates without a value are ignored.
+    """
+    ordinals = np.asarray(dates_to_ordinal(datetimes), dtype=np.int64)
+
+    if drop_duplicates:
+        # First occurrence of every ordinal, in input order
+        _, index = np.unique(ordinals, return_index=True)
+        index.sort()
+    else:
+        index = np.arange(len(ordinals))
 
-    seen = set()
-    uniq_ordinals = []
-    uniq_values = []
+    with_value = index[index < len(values)]
+    if isinstance(values, (pd.Series, pd.Index, np.ndarray)):
+        uniq_values = np.asarray(values)[with_value].tolist()
+    else:
+        uniq_values = [values[i] for i in with_value]
 
-    for i in range(len(ordinals)):
-        if drop_duplicates and ordinals[i] in seen:
-            continue
+    return ordinals[index].tolist(), uniq_values
 
-        seen.add(ordinals[i])
-        uniq_ordinals.append(ordinals[i])
-        if len(values) > i:
-            uniq_values.append(values[i])
 
-    return uniq_ordinals, uniq_values
+def dates_to_ordinal_grouped(df, by='pid', dt_col='_dt'):
+    """
+    Computes day ordinals relative to the first date of each group in one pass.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame with a datetime64 column.
+    by (str): Column identifying the group (patient). Defaults to 'pid'.
+    dt_col (str): Datetime column. Defaults to '_dt'.
+
+    Returns:
+    pd.Series: int64 ordinals aligned with df.
+    """
+    days = pd.Series(dates_to_days(df[dt_col]), index=df.index)
+
+    return days - days.groupby(df[by]).transform('min')
 
 
 def dates_fill_period(start_date, end_date):
@@ -39,18 +86,77 @@ def dates_fill_period(start_date, end_date):
     return [start_date + timedelta(days=i) for i in range(days + 1)]
 
 
+def day_offsets(lengths):
+    """
+    Returns 0, 1, ..., length-1 for every length, concatenated (np.repeat companion).
+    """
+    return np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+
+
 def df_fill_period(df):
     """
     Generates list of dates from start_dt to end_dt from all DataFrame rows
     Avoids duplicates and sorts them
     """
-    dates = []
-    for _, r in df.iterrows():
-        dates += dates_fill_period(r.start_dt, r.end_dt)
-    dates = list(set(dates))
-    dates.sort()
+    if df.empty:
+        return []
+
+    lengths = np.clip(dates_to_days(df.end_dt) - dates_to_days(df.start_dt) + 1, 0, None)
+    dates = df.start_dt.repeat(lengths).reset_index(drop=True) + pd.to_timedelta(day_offsets(lengths), unit='D')
+
+    return dates.drop_duplicates().sort_values().tolist()
 
-    return dates
+
+def expand_days(df, by='pid', start_col='start_dt', end_col='end_dt', dedupe=True, as_presence=False):
+    """
+    Expands every interval row into one row per calendar day it covers, without iterating rows.
+
+    Parameters:
+    df (pd.DataFrame): Intervals with columns `by`, `start_col` and `end_col`.
+    by (str): Column identifying the patient. Defaults to 'pid'.
+    start_col (str): Interval start column. Defaults to 'start_dt'.
+    end_col (str): Interval end column (inclusive). Defaults to 'end_dt'.
+    dedupe (bool): If True, days covered by several intervals of a patient appear once, sorted. Defaults to True.
+    as_presence (bool): If True, return a boolean day-presence array per patient instead. Defaults to False.
+
+    Returns:
+    pd.DataFrame: Columns `by` and 'day' (datetime64 at midnight), one row per covered day.
+        With as_presence, one row per patient (indexed by `by`) with 'first_day' and 'presence', a
+        boolean array whose position i tells whether first_day + i days is covered.
+    """
+    starts = dates_to_days(df[start_col])
+    lengths = np.clip(dates_to_days(df[end_col]) - starts + 1, 0, None)
+
+    rows = np.repeat(np.arange(len(df)), lengths)
+    days = starts[rows] + day_offsets(lengths)
+    codes, pids = pd.factorize(df[by].to_numpy()[rows], sort=True)
+
+    if dedupe or as_presence:
+        first = days.min() if len(days) else 0
+        span = (days.max() - first + 1) if len(days) else 1
+        keys = np.unique(codes.astype(np.int64) * span + (days - first))
+        codes, days = keys // span, keys % span + first
+
+    if not as_presence:
+        return pd.DataFrame({
+            by: pids.take(codes),
+            'day': days.astype('datetime64[D]').astype('datetime64[ns]'),
+        })
+
+    group_start = np.flatnonzero(np.diff(codes, prepend=-1) != 0)
+    first_day = days[group_start]
+    last_day = np.append(days[group_start[1:] - 1], days[-1:])
+    sizes = last_day - first_day + 1
+    bounds = np.cumsum(sizes) - sizes
+
+    presence = np.zeros(int(sizes.sum()), dtype=bool)
+    group = np.cumsum(np.diff(codes, prepend=-1) != 0) - 1
+    presence[bounds[group] + days - first_day[group]] = True
+
+    return pd.DataFrame({
+        'first_day': first_day.astype('datetime64[D]').astype('datetime64[ns]'),
+        'presence': pd.Series(np.split(presence, bounds[1:]), dtype=object).to_numpy(),
+    }, index=pd.Index(pids.take(codes[group_start]), name=by))
 
 
 def unify_dates(datetimes, days=1):
@@ -1,52 +1,117 @@
-# Filling mode: last. true_between, always_false, always_true
-def fill_value(prev_v, curr_v, prev_o, curr_o,mode, threshold=2):
+import numpy as np
+import pandas as pd
+
+
+# Filling modes of the days of a gap:
+# - last: value of the previous day
+# - true_between: True if the days before and after the gap are both True
+# - true_between_threshold: as true_between, if the gap is at most threshold days
+# - always_false, always_true: False or True
+MODES = ('last', 'true_between', 'true_between_threshold', 'always_false', 'always_true')
+
+
+def fill_arrays(ordinals, values, first, mode='true_between', threshold=2):
+    """
+    Vectorized core of fill_gaps.
+
+    Parameters:
+    ordinals (np.ndarray): Sorted int day ordinals.
+    values (np.ndarray): Value of every ordinal.
+    first (np.ndarray): True where no gap must be filled before the element (start of a group).
+    mode (str): Filling mode, one of MODES.
+    threshold (int): Maximum distance for the 'true_between_threshold' mode.
+
+    Returns:
+    tuple: Input element each output row comes from, filled ordinals and filled values.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode}")
+
+    n = len(ordinals)
+    distance = np.diff(ordinals, prepend=ordinals[:1])
+    gaps = np.where(first, 0, np.clip(distance - 1, 0, None))
+
+    # Value used for the days of the gap before every element
+    prev_values = np.roll(values, 1)
     if mode == 'always_false':
-        return False
+        fill = np.zeros(n, dtype=bool)
     elif mode == 'always_true':
-        return True
+        fill = np.ones(n, dtype=bool)
     elif mode == 'last':
-        return prev_v
-    elif mode == 'true_between':
-        if prev_v and curr_v:
-            return True
-        else:
-            return False
-    elif mode == 'true_between_threshold':
-        if (prev_v and curr_v) and ((curr_o - prev_o) <= threshold):
-            return True
-        else:
-            return False
-    
-    raise ValueError(f"Unknown mode {mode}")
-
-
-def fill_gaps(ordinals, values, mode='true_between', threshold=2):
-    prev_o, prev_v = None, None
-
-    res_o, res_v = [], []
-    for o, v in zip(ordinals,values):
-        # First element
-        if prev_o is None:
-            prev_o, prev_v = o, v
-            res_o.append(o)
-            res_v.append(v)
-            continue
-
-        # No gap
-        if o == (prev_o + 1):
-            res_o.append(o)
-            res_v.append(v)
-            prev_o, prev_v = o, v
-            continue
-
-        # Fill gap with previous values
-        els = [el for el in range(prev_o + 1, o)]
-        for el in els:
-            res_o.append(el)
-            res_v.append(fill_value(prev_v, v, prev_o, o, mode, threshold))
-
-        res_o.append(o)
-        res_v.append(v)
-        prev_o, prev_v = o, v
-
-    return res_o, res_v
\ No newline at end of file
+        fill = prev_values
+    else:
+        states = values.astype(bool)
+        fill = np.roll(states, 1) & states
+        if mode == 'true_between_threshold':
+            fill &= distance <= threshold
+
+    # Every element is preceded by its gap in the output
+    positions = np.arange(n) + np.cumsum(gaps)
+    total = n + int(gaps.sum())
+    owner = np.repeat(np.arange(n), gaps)
+    is_gap = np.ones(total, dtype=bool)
+    is_gap[positions] = False
+    gap_positions = np.flatnonzero(is_gap)
+    offset = gap_positions - (positions[owner] - gaps[owner])
+
+    res_o = np.empty(total, dtype=ordinals.dtype)
+    res_o[positions] = ordinals
+    res_o[gap_positions] = ordinals[owner - 1] + 1 + offset
+
+    # Bool fills between other values are kept as bools, as in a list of mixed values
+    dtype = values.dtype if fill.dtype == values.dtype else object
+    res_v = np.empty(total, dtype=dtype)
+    res_v[positions] = values
+    res_v[gap_positions] = fill[owner]
+
+    # Gap rows come from the element that closes the gap, for carrying group keys along
+    source = np.empty(total, dtype=np.int64)
+    source[positions] = np.arange(n)
+    source[gap_positions] = owner
+
+    return source, res_o, res_v
+
+
+def fill_gaps(ordinals, values, mode='true_between', threshold=2, as_array=False):
+    n = min(len(ordinals), len(values))
+    ordinals = np.asarray(ordinals, dtype=np.int64)[:n]
+    values = np.asarray(values)[:n]
+    first = np.zeros(n, dtype=bool)
+    first[:1] = True
+
+    _, res_o, res_v = fill_arrays(ordinals, values, first, mode, threshold)
+
+    if as_array:
+        return res_o, res_v
+
+    return res_o.tolist(), res_v.tolist()
+
+
+def fill_gaps_grouped(df, by='pid', ordinal_col='ordinal', value_col='value', mode='true_between', threshold=2):
+    """
+    Fill the gaps of every group of a DataFrame in one vectorized pass.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame with one row per observation.
+    by (str): Column identifying the group (patient). Defaults to 'pid'.
+    ordinal_col (str): Column with the day ordinal of each observation. Defaults to 'ordinal'.
+    value_col (str): Column with the value of each observation. Defaults to 'value'.
+    mode (str): Filling mode, as in fill_gaps. Defaults to 'true_between'.
+    threshold (int): Maximum distance for the 'true_between_threshold' mode. Defaults to 2.
+
+    Returns:
+    pd.DataFrame: Columns `by`, `ordinal_col` and `value_col`, sorted by group and ordinal, with a row
+        for every day between the first and last observation of each group.
+    """
+    data = df[[by, ordinal_col, value_col]].sort_values([by, ordinal_col], kind='stable')
+    groups = data[by].to_numpy()
+    first = np.ones(len(data), dtype=bool)
+    first[1:] = groups[1:] != groups[:-1]
+
+    source, res_o, res_v = fill_arrays(
+        data[ordinal_col].to_numpy(dtype=np.int64),
+        data[value_col].to_numpy(),
+        first, mode, threshold
+    )
+
+    return pd.DataFrame({by: groups[source], ordinal_col: res_o, value_col: res_v})
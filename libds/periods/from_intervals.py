@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+from .compute_periods import periods_dict, periods_tables
+from .dates import dates_to_days
+
+
+def interval_runs(codes, starts, ends):
+    """
+    Merge overlapping or adjacent day intervals of every group with a sweep line.
+
+    Parameters:
+    codes (np.ndarray): Group code of every interval.
+    starts, ends (np.ndarray): First and last day (inclusive) of every interval.
+
+    Returns:
+    tuple: Group code, first day and last day of every merged run, sorted by group and day.
+    """
+    valid = ends >= starts
+    codes, starts, ends = codes[valid], starts[valid], ends[valid]
+    order = np.lexsort((starts, codes))
+    codes, starts, ends = codes[order], starts[order], ends[order]
+
+    if not len(codes):
+        return codes, starts, ends
+
+    # Shift days by group so a running maximum never crosses groups
+    first = min(starts.min(), ends.min())
+    span = ends.max() - first + 2
+    base = codes.astype(np.int64) * span - first
+    covered = np.maximum.accumulate(ends + base)
+
+    new_group = np.diff(codes, prepend=-1) != 0
+    # A run starts where the interval does not touch anything covered before it
+    new_run = new_group | (starts + base > np.concatenate(([0], covered[:-1])) + 1)
+    run_start = np.flatnonzero(new_run)
+    run_last = np.append(run_start[1:], len(codes)) - 1
+
+    return codes[run_start], starts[run_start], covered[run_last] - base[run_last]
+
+
+def compute_periods_from_intervals_grouped(df, by='pid', start_col='start_dt', end_col='end_dt', prefix="",
+                                           return_periods=False):
+    """
+    Compute period statistics from datetime intervals without expanding them to days.
+
+    Gives the same result as expanding each patient's intervals to calendar days (expand_days)
+    and running compute_periods over the day-presence array, in memory proportional to the
+    number of intervals.
+
+    Parameters:
+    df (pd.DataFrame): Intervals with columns `by`, `start_col` and `end_col`.
+    by (str): Column identifying the patient. Defaults to 'pid'.
+    start_col (str): Interval start column. Defaults to 'start_dt'.
+    end_col (str): Interval end column (inclusive). Defaults to 'end_dt'.
+    prefix (str): Prefix added to the statistic columns. Defaults to "".
+    return_periods (bool): If True, also return a long table with one row per period. Defaults to False.
+
+    Returns:
+    pd.DataFrame: As compute_periods_grouped, with starts and ends relative to each patient's first covered day.
+    """
+    codes, groups = pd.factorize(df[by], sort=True)
+    run_group, starts, ends = interval_runs(codes, dates_to_days(df[start_col]), dates_to_days(df[end_col]))
+
+    # Patients whose intervals are all empty have no covered day
+    covered_groups = np.unique(run_group)
+    groups = groups.take(covered_groups)
+    run_group = np.searchsorted(covered_groups, run_group)
+
+    first_day = starts[np.diff(run_group, prepend=-1) != 0][run_group]
+
+    return periods_tables(groups, run_group, starts - first_day, ends - first_day, by, prefix, return_periods)
+
+
+def compute_periods_from_intervals(intervals, prefix="", interval_stats=True, as_array=False):
+    """
+    Compute the compute_periods output of the days covered by a list of datetime intervals.
+
+    Parameters:
+    intervals (pd.DataFrame or list): DataFrame with 'start_dt' and 'end_dt' columns, or (start_dt, end_dt) pairs.
+    prefix (str): Prefix added to the keys. Defaults to "".
+    interval_stats (bool): If True, include intervals, durations, starts and ends. Defaults to True.
+    as_array (bool): If True, return ndarrays instead of lists. Defaults to False.
+
+    Returns:
+    dict: Same keys as compute_periods, with day 0 being the first covered day.
+    """
+    if not isinstance(intervals, pd.DataFrame):
+        intervals = pd.DataFrame(list(intervals), columns=['start_dt', 'end_dt'])
+
+    codes = np.zeros(len(intervals), dtype=np.int64)
+    _, starts, ends = interval_runs(
+        codes, dates_to_days(intervals['start_dt']), dates_to_days(intervals['end_dt'])
+    )
+    if len(starts):
+        starts, ends = starts - starts[0], ends - starts[0]
+
+    return periods_dict(starts, ends, prefix, interval_stats, as_array)
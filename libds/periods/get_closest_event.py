@@ -1,10 +1,23 @@
 from datetime import timedelta
 
+import numpy as np
+import pandas as pd
+
+from .index import NAT, GroupedTimes, PatientIndex, to_ns
+
+
+DAY_NS = 86400 * 10**9
+
+
 def get_closest_event(df, pid, admission_id, _dt, days_before=30, days_after=0):
     end_dt = _dt + timedelta(days=days_after)
     # Up to days_before before
     start_dt = _dt - timedelta(days=days_before)
 
+    if isinstance(df, PatientIndex):
+        # Same admission events can be earlier than start_dt, so the window only ends
+        df = df.patient(pid, end_dt=end_dt)
+
     df_events = df[
         (df.pid == pid)
         & (df._dt <= end_dt )
@@ -20,4 +33,79 @@ def get_closest_event(df, pid, admission_id, _dt, days_before=30, days_after=0):
     df_events['distance'] = abs((df_events._dt - _dt).dt.total_seconds())
     df_events.sort_values('distance', ascending=True, inplace=True)
 
-    return df_events.iloc[0]
\ No newline at end of file
+    return df_events.iloc[0]
+
+
+def _neighbours(index, groups, times, start_ns, end_ns):
+    """
+    Rows of the last event at or before each time and of the first event after it, within its
+    group. -1 where there is no such event or it is outside [start_ns, end_ns].
+    """
+    if not len(index):
+        return np.full(len(times), -1), np.full(len(times), -1)
+
+    lo, hi = index.bounds(groups)
+    right = index.search(groups, times, 'right')
+    # Several events at the same time: take the first one in df
+    left = index.first_equal(np.maximum(right - 1, 0))
+
+    result = []
+    for positions, inside in ((left, right > lo), (right, right < hi)):
+        positions = np.minimum(positions, len(index) - 1)
+        event_times = index.times[positions]
+        found = inside & (event_times >= start_ns) & (event_times <= end_ns)
+        result.append(np.where(found, index.order[positions], -1))
+
+    return result
+
+
+def get_closest_events(df, df_queries, days_before=30, days_after=0):
+    """
+    Batch version of get_closest_event: the closest event for every query row in one pass.
+
+    Events of the same admission as the query are eligible from any earlier date; other events
+    must fall within days_before before the query date. No event can be later than days_after
+    after it. On equal distances the earlier event (then the first one in df) is chosen.
+
+    Parameters:
+    df (pd.DataFrame): Events with columns 'pid', 'admission_id' and '_dt'.
+    df_queries (pd.DataFrame): Queries with columns 'pid', 'admission_id' and '_dt'.
+    days_before (int): Days before the query date to look for events. Defaults to 30.
+    days_after (int): Days after the query date to look for events. Defaults to 0.
+
+    Returns:
+    pd.DataFrame: The closest event of every query (indexed like df_queries) with a 'distance'
+        column in seconds. Rows are NaN where no event is eligible.
+    """
+    # Events without a date are never eligible, as in get_closest_event
+    df = df[df._dt.notna()]
+    if len(df) == 0:
+        result = df.reset_index(drop=True).reindex(np.full(len(df_queries), -1))
+        result['distance'] = np.nan
+        result.index = df_queries.index
+        return result
+
+    times = to_ns(df_queries._dt)
+    end_ns = times + days_after * DAY_NS
+
+    events = GroupedTimes(df.pid.to_numpy(), df._dt)
+    left, right = _neighbours(events, df_queries.pid.to_numpy(), times, times - days_before * DAY_NS, end_ns)
+
+    # Events of the same admission have no lower bound
+    same = GroupedTimes(pd.MultiIndex.from_arrays([df.pid, df.admission_id]), df._dt)
+    admission = pd.MultiIndex.from_arrays([df_queries.pid, df_queries.admission_id])
+    same_left, same_right = _neighbours(same, admission, times, NAT, end_ns)
+    has_admission = df_queries.admission_id.notna().to_numpy()
+
+    left = np.where(left >= 0, left, np.where(has_admission, same_left, -1))
+    right = np.where(right >= 0, right, np.where(has_admission, same_right, -1))
+
+    event_ns = to_ns(df._dt)
+    use_left = (left >= 0) & ((right < 0) | (times - event_ns[left] <= event_ns[right] - times))
+    rows = np.where(use_left, left, right)
+
+    result = df.reset_index(drop=True).reindex(rows)
+    result['distance'] = np.where(rows >= 0, np.abs(times - event_ns[rows]) / 1e9, np.nan)
+    result.index = df_queries.index
+
+    return result
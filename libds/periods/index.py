@@ -0,0 +1,371 @@
+import numpy as np
+import pandas as pd
+
+from .dates import day_offsets
+
+
+NAT = np.iinfo(np.int64).min
+
+
+def to_ns(datetimes):
+    """
+    Converts a datetime scalar or array-like to int64 nanoseconds (UTC for tz-aware values).
+    NaT becomes the minimum int64.
+    """
+    if np.ndim(datetimes) == 0:
+        return pd.Timestamp(datetimes).as_unit('ns').value
+
+    return pd.DatetimeIndex(datetimes).as_unit('ns').asi8
+
+
+def searchsorted(a, v, side='left'):
+    """
+    np.searchsorted for large unsorted arrays of values. Searching sorted values is cache friendly
+    and several times faster, so values are sorted first and results put back in their order.
+    """
+    v = np.asarray(v)
+    if v.ndim == 0 or len(v) < 1024:
+        return np.searchsorted(a, v, side=side)
+
+    order = np.argsort(v)
+    result = np.empty(len(v), dtype=np.int64)
+    result[order] = np.searchsorted(a, v[order], side=side)
+
+    return result
+
+
+class TimeKeys:
+    """
+    Encodes (group, time) pairs as int64 keys that sort by group and then time.
+
+    Times are replaced by their rank among the times seen at build time, so any number of
+    groups fits in an int64. A single np.searchsorted over sorted keys then does a binary
+    search inside the right group for a whole array of queries. Unknown groups get keys
+    below every known one, which gives empty ranges.
+    """
+    def __init__(self, groups, *times):
+        # Groups made of several columns can be passed as a pd.MultiIndex
+        self.groups = groups.unique() if isinstance(groups, pd.Index) else pd.Index(pd.unique(np.asarray(groups)))
+        self.times = np.unique(np.concatenate(times)) if times else np.empty(0, dtype=np.int64)
+        self.size = len(self.times) + 1
+
+    def codes(self, groups):
+        if not isinstance(groups, pd.Index):
+            groups = np.asarray(groups)
+        return self.groups.get_indexer(groups).astype(np.int64)
+
+    def encode(self, codes, times):
+        """Keys of times seen at build time."""
+        return codes * self.size + np.searchsorted(self.times, times)
+
+    def query(self, codes, times, side='right'):
+        """
+        Keys for searching. Stored keys lower than the 'right' query key have a time <= times,
+        and those lower than the 'left' query key have a time < times (both in the same group).
+        """
+        return codes * self.size + searchsorted(self.times, times, side=side)
+
+    def bounds(self, keys, codes):
+        """First and last + 1 position of every group in sorted keys."""
+        return np.searchsorted(keys, codes * self.size), np.searchsorted(keys, (codes + 1) * self.size)
+
+
+class GroupedTimes:
+    """
+    Times sorted by group (patient) and time, with binary search inside each group.
+
+    Parameters:
+    groups (array-like or pd.MultiIndex): Group of every time.
+    times (array-like): Datetimes.
+
+    Attributes:
+    order (np.ndarray): Original position of every sorted time (ties keep their original order).
+    keys (np.ndarray): Sorted (group, time) keys.
+    times (np.ndarray): Sorted times as int64 nanoseconds.
+    """
+    def __init__(self, groups, times):
+        times = to_ns(times)
+        self.encoder = TimeKeys(groups, times)
+        keys = self.encoder.encode(self.encoder.codes(groups), times)
+
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+        self.times = times[self.order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def bounds(self, groups):
+        """First and last + 1 sorted position of the group of every query (empty for unknown groups)."""
+        return self.encoder.bounds(self.keys, self.encoder.codes(groups))
+
+    def search(self, groups, times, side='left'):
+        """
+        Sorted position of every query time inside its group: the first time >= it ('left')
+        or the first time > it ('right'), as np.searchsorted.
+        """
+        query = self.encoder.query(self.encoder.codes(groups), np.atleast_1d(to_ns(times)), side)
+        return searchsorted(self.keys, query)
+
+    def first_equal(self, positions):
+        """First sorted position holding the same group and time as each position."""
+        return searchsorted(self.keys, self.keys[positions])
+
+
+class PatientIndex:
+    """
+    Events stored contiguously by patient and date, built once and sliced per patient in O(1).
+
+    The frame is sorted by (pid, _dt) and every patient owns the rows offsets[i] to offsets[i+1],
+    so date windows inside a patient are found with a binary search. Functions that filter an
+    event frame with df[df.pid == pid] accept a PatientIndex in its place.
+
+    Parameters:
+    df (pd.DataFrame): Events with columns `by` and `dt_col`.
+    by (str): Patient column. Defaults to 'pid'.
+    dt_col (str): Event date column. Defaults to '_dt'.
+
+    Attributes:
+    df (pd.DataFrame): The events sorted by patient and date (ties keep their order).
+    pids (pd.Index): Sorted patients.
+    offsets (np.ndarray): First row of every patient in df, plus the number of rows at the end.
+    times (np.ndarray): Event dates as int64 nanoseconds (NaT sorts first within a patient).
+    """
+    def __init__(self, df, by='pid', dt_col='_dt'):
+        codes, self.pids = pd.factorize(df[by], sort=True)
+        times = to_ns(df[dt_col])
+
+        order = np.lexsort((times, codes))
+        self.df = df.iloc[order]
+        self.by, self.dt_col = by, dt_col
+        self.times = times[order]
+        self.offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(self.pids)))))
+        self._columns = dict()
+
+    def __len__(self):
+        return len(self.df)
+
+    def __contains__(self, pid):
+        return pid in self.pids
+
+    def bounds(self, pid, start_dt=None, end_dt=None, inclusive=True):
+        """
+        First and last + 1 row in df of the events of a patient within a date window.
+
+        Parameters:
+        pid: Patient.
+        start_dt (datetime): Window start (inclusive). None for no start. Defaults to None.
+        end_dt (datetime): Window end. None for no end. Defaults to None.
+        inclusive (bool): If True, events on end_dt are included. Defaults to True.
+
+        Returns:
+        tuple: Row offsets. Events without a date are only included when there is no window,
+            and a NaT bound gives an empty range, as comparisons with df[dt_col] would.
+        """
+        try:
+            code = self.pids.get_loc(pid)
+        except KeyError:
+            return 0, 0
+
+        lo, hi = self.offsets[code], self.offsets[code + 1]
+        if (start_dt is None) and (end_dt is None):
+            return lo, hi
+
+        times = self.times[lo:hi]
+        start = NAT + 1 if start_dt is None else to_ns(start_dt)
+        end = to_ns(end_dt) if end_dt is not None else np.iinfo(np.int64).max
+        if (start == NAT) or (end == NAT):
+            return lo, lo
+
+        first = lo + np.searchsorted(times, start, side='left')
+        last = lo + np.searchsorted(times, end, side='right' if inclusive else 'left')
+
+        return first, max(first, last)
+
+    def patient(self, pid, start_dt=None, end_dt=None, inclusive=True):
+        """The events of a patient within a date window (see bounds), as a slice of df."""
+        lo, hi = self.bounds(pid, start_dt, end_dt, inclusive)
+
+        return self.df.iloc[lo:hi]
+
+    def values(self, column, pid, start_dt=None, end_dt=None, inclusive=True):
+        """A column of the events of a patient within a date window, as a NumPy view."""
+        if column not in self._columns:
+            self._columns[column] = self.df[column].to_numpy()
+        lo, hi = self.bounds(pid, start_dt, end_dt, inclusive)
+
+        return self._columns[column][lo:hi]
+
+
+class PatientIntervalIndex:
+    """
+    Per-patient sorted intervals for finding the interval that contains a date.
+
+    Built once from a frame of intervals, it answers find_interval_by_date lookups with
+    binary searches instead of scanning the whole frame.
+
+    Parameters:
+    df (pd.DataFrame): DataFrame containing the intervals with columns 'pid', 'start_dt', and 'end_dt'.
+    by (str): Patient column. Defaults to 'pid'.
+    start_col (str): Interval start column. Defaults to 'start_dt'.
+    end_col (str): Interval end column (inclusive). Defaults to 'end_dt'.
+    """
+    def __init__(self, df, by='pid', start_col='start_dt', end_col='end_dt'):
+        self.df = df
+        self.by, self.start_col, self.end_col = by, start_col, end_col
+
+        pids = df[by].to_numpy()
+        starts, ends = to_ns(df[start_col]), to_ns(df[end_col])
+        # Intervals with NaT or ending before they start never contain a date
+        rows = np.flatnonzero((starts != NAT) & (ends != NAT) & (starts <= ends))
+        pids, starts, ends = pids[rows], starts[rows], ends[rows]
+
+        self.keys = TimeKeys(pids, starts, ends)
+        codes = self.keys.codes(pids)
+        start_keys = self.keys.encode(codes, starts)
+        end_keys = self.keys.encode(codes, ends)
+
+        order = np.lexsort((rows, start_keys))
+        self.rows = rows[order]
+        self.start_keys = start_keys[order]
+        self.end_keys = end_keys[order]
+        self.sorted_end_keys = np.sort(end_keys)
+        # Furthest end reached by any interval starting before, per patient
+        self.reach = np.maximum.accumulate(self.end_keys)
+
+    def __len__(self):
+        return len(self.df)
+
+    def search(self, pids, dts):
+        """
+        Count the intervals that contain each date and find the first of them.
+
+        Parameters:
+        pids (array-like): Patient of every query.
+        dts (array-like): Date of every query.
+
+        Returns:
+        tuple: Number of containing intervals, and position in the sorted intervals of the
+            first one by start (only meaningful where the count is not 0).
+        """
+        codes = self.keys.codes(np.atleast_1d(pids))
+        times = np.atleast_1d(to_ns(dts))
+
+        # Keys of the first stored time >= every date, sorted once: the three searches below
+        # are then cache friendly
+        before = self.keys.encode(codes, times)
+        order = np.argsort(before)
+        before, times = before[order], times[order]
+        # Stored times are unique, so the first time > the date is the next one if they are equal
+        ranks = np.minimum(before % self.keys.size, len(self.keys.times) - 1)
+        after = before + (self.keys.times[ranks] == times) if len(self.keys.times) else before
+
+        counts = np.empty(len(order), dtype=np.int64)
+        first = np.empty(len(order), dtype=np.int64)
+        counts[order] = np.searchsorted(self.start_keys, after) - np.searchsorted(self.sorted_end_keys, before)
+        first[order] = np.searchsorted(self.reach, before)
+
+        return counts, first
+
+    def _first_in_frame_order(self, pid, dt):
+        """Row position of the first containing interval in frame order (slow path for overlaps)."""
+        code = self.keys.codes([pid])
+        started = np.searchsorted(self.start_keys, self.keys.query(code, [to_ns(dt)], 'right'))[0]
+        before = self.keys.query(code, [to_ns(dt)], 'left')[0]
+        lo, _ = self.keys.bounds(self.start_keys, code)
+
+        candidates = np.arange(lo[0], started)
+        return self.rows[candidates[self.end_keys[candidates] >= before]].min()
+
+    def positions(self, pids, dts, strict=True):
+        """
+        Bulk version of find: row position in df of the interval containing every date.
+
+        Parameters:
+        pids (array-like): Patient of every query.
+        dts (array-like): Date of every query.
+        strict (bool): If True, asserts that exactly one interval is found for every query. Defaults to True.
+
+        Returns:
+        np.ndarray: Row positions in df, -1 where no interval contains the date. When several do,
+            the first one in df order is used.
+        """
+        counts, first = self.search(pids, dts)
+        if strict:
+            assert (counts == 1).all(), f"{(counts != 1).sum()} dates are not in exactly one interval"
+
+        positions = np.full(len(counts), -1, dtype=np.int64)
+        found = counts > 0
+        positions[found] = self.rows[first[found]]
+
+        pids, dts = np.atleast_1d(pids), np.atleast_1d(dts)
+        for i in np.flatnonzero(counts > 1):
+            positions[i] = self._first_in_frame_order(pids[i], dts[i])
+
+        return positions
+
+    def overlaps(self, pids, starts, ends, contained=False):
+        """
+        Find the intervals that overlap (or are contained in) every query interval.
+
+        Candidates are the intervals starting between the first one that reaches the query start
+        and the query end, found by binary search, so the cost is O(log n) plus the candidates.
+
+        Parameters:
+        pids (array-like): Patient of every query.
+        starts, ends (array-like): Query intervals (inclusive).
+        contained (bool): If True, only intervals fully inside the query interval match. Defaults to False.
+
+        Returns:
+        tuple: Query positions and row positions in df of every matching pair, sorted by query
+            and then by interval start.
+        """
+        codes = self.keys.codes(np.atleast_1d(pids))
+        starts, ends = np.atleast_1d(to_ns(starts)), np.atleast_1d(to_ns(ends))
+
+        after_end = self.keys.query(codes, ends, 'right')
+        before_start = self.keys.query(codes, starts, 'left')
+        # Intervals starting up to the query end
+        hi = searchsorted(self.start_keys, after_end)
+        if contained:
+            lo = searchsorted(self.start_keys, before_start)
+        else:
+            lo = searchsorted(self.reach, before_start)
+
+        lengths = np.clip(hi - lo, 0, None)
+        queries = np.repeat(np.arange(len(codes)), lengths)
+        positions = np.repeat(lo, lengths) + day_offsets(lengths)
+
+        if contained:
+            match = self.end_keys[positions] < after_end[queries]
+        else:
+            match = self.end_keys[positions] >= before_start[queries]
+
+        return queries[match], self.rows[positions[match]]
+
+    def find(self, _dt, pid=None, strict=True):
+        """
+        Find the interval that contains a given date for a given patient, as find_interval_by_date.
+
+        Parameters:
+        _dt (datetime): The date to find the interval for.
+        pid (int or str): Patient ID to search for. If None, all patients are considered. Defaults to None.
+        strict (bool): If True, asserts that exactly one interval is found. Defaults to True.
+
+        Returns:
+        pd.Series: The row of the DataFrame that contains the interval, or None if not strict and not found.
+        """
+        if pid is None:
+            df = self.df
+            res = df[(df[self.start_col] <= _dt) & (df[self.end_col] >= _dt)]
+            if strict:
+                assert len(res) == 1
+            elif len(res) == 0:
+                return None
+            return res.iloc[0]
+
+        position = self.positions([pid], [_dt], strict)[0]
+        if position < 0:
+            return None
+
+        return self.df.iloc[position]
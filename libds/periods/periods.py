@@ -0,0 +1,184 @@
+import numpy as np
+
+
+def merge_arrays(joined, intervals, durations, starts, ends):
+    """
+    Merge periods stored in arrays into the previous one where joined is True.
+
+    A merged period keeps the interval and start of its first member and the end of its last
+    one. Its duration adds the durations of all members and the intervals between them.
+
+    Returns:
+    tuple: intervals, durations, starts and ends of the merged periods.
+    """
+    if not len(joined):
+        return intervals, durations, starts, ends
+
+    first = np.flatnonzero(~joined)
+    last = np.append(first[1:], len(joined)) - 1
+    # Members after the first contribute their duration and the interval before them
+    spans = np.where(joined, intervals, 0) + durations
+    merged_durations = np.add.reduceat(spans, first)
+
+    return intervals[first], merged_durations, starts[first], ends[last]
+
+
+class Periods:
+    """
+    Array-backed periods, as returned by compute_periods.
+
+    Intervals, durations, starts and ends are stored in int64 arrays. Every operation builds a
+    new object in a single pass over them, without copying anything else. Reading keys
+    works as with the dict from compute_periods, so periods['durations'] keeps working.
+
+    As with join_specific_periods and delete_period, days and max_consec_days are carried over
+    unchanged by every operation. periods is always computed from the current arrays.
+    """
+    __slots__ = ('days', 'max_consec_days', 'intervals', 'durations', 'starts', 'ends')
+
+    ARRAYS = ('intervals', 'durations', 'starts', 'ends')
+    KEYS = ('days', 'periods', 'max_consec_days') + ARRAYS
+
+    def __init__(self, intervals, durations, starts, ends, days=None, max_consec_days=None):
+        self.intervals = np.asarray(intervals, dtype=np.int64)
+        self.durations = np.asarray(durations, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self.days = int(self.durations.sum()) if days is None else days
+        if max_consec_days is None:
+            max_consec_days = int(self.durations.max()) if len(self.durations) else 0
+        self.max_consec_days = max_consec_days
+
+    @classmethod
+    def from_dict(cls, periods, prefix=""):
+        """Build from a compute_periods result (with list or array values)."""
+        return cls(
+            *(periods[prefix + key] for key in cls.ARRAYS),
+            days=periods.get(prefix + 'days'),
+            max_consec_days=periods.get(prefix + 'max_consec_days'),
+        )
+
+    def to_dict(self, prefix="", as_array=False):
+        """Return a dict like compute_periods does, with lists unless as_array is True."""
+        result = dict()
+        for key in self.KEYS:
+            value = self[key]
+            if (key in self.ARRAYS) and not as_array:
+                value = value.tolist()
+            result[prefix + key] = value
+
+        return result
+
+    @property
+    def periods(self):
+        return len(self.starts)
+
+    # dict-like access
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        # Number of keys, as for a dict: the number of periods is in periods
+        return len(self.KEYS)
+
+    def keys(self):
+        return list(self.KEYS)
+
+    def values(self):
+        return [self[key] for key in self.KEYS]
+
+    def items(self):
+        return [(key, self[key]) for key in self.KEYS]
+
+    def get(self, key, default=None):
+        return self[key] if key in self.KEYS else default
+
+    def __eq__(self, other):
+        if isinstance(other, (Periods, dict)):
+            return self.to_dict() == (other.to_dict() if isinstance(other, Periods) else other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"Periods(days={self.days}, periods={self.periods}, starts={self.starts.tolist()}, ends={self.ends.tolist()})"
+
+    # Operations
+    def _check_index(self, n, last):
+        if (n < 0) or (n > last):
+            raise IndexError('period index out of range')
+
+    def merge(self, joined):
+        """
+        Merge periods into the previous one.
+
+        Parameters:
+        joined (array-like of bool): joined[i] True merges period i into period i-1. Must be False for
+            the first period.
+
+        Returns:
+        Periods: The merged periods. A merged period lasts from the first start to the last end
+            of its members, including the intervals between them.
+        """
+        joined = np.asarray(joined, dtype=bool)
+        if len(joined) != self.periods:
+            raise ValueError('joined must have one value per period')
+        if len(joined) and joined[0]:
+            raise ValueError('first period can not be joined to a previous one')
+
+        merged = merge_arrays(joined, self.intervals, self.durations, self.starts, self.ends)
+
+        return Periods(*merged, days=self.days, max_consec_days=self.max_consec_days)
+
+    def join(self, n):
+        """Join period n with period n+1, like join_specific_periods."""
+        self._check_index(n, self.periods - 2)
+        joined = np.zeros(self.periods, dtype=bool)
+        joined[n + 1] = True
+
+        return self.merge(joined)
+
+    def join_by_distance(self, distance):
+        """Join every period with the previous one when the interval between them is at most distance."""
+        joined = self.intervals <= distance
+        joined[:1] = False
+
+        return self.merge(joined)
+
+    def filter(self, keep):
+        """
+        Keep only some periods. The days of every removed period, and the interval before it,
+        are added to the interval of the next kept period (as delete_period does).
+
+        Parameters:
+        keep (array-like of bool): keep[i] True keeps period i.
+
+        Returns:
+        Periods: The remaining periods.
+        """
+        keep = np.asarray(keep, dtype=bool)
+        if len(keep) != self.periods:
+            raise ValueError('keep must have one value per period')
+
+        removed = np.cumsum(np.where(keep, 0, self.intervals + self.durations))
+        kept = np.flatnonzero(keep)
+        # Removed time accumulated since the previous kept period
+        previous = np.concatenate(([0], removed[kept[:-1]]))
+        intervals = self.intervals[kept] + removed[kept] - previous
+
+        return Periods(intervals, self.durations[kept], self.starts[kept], self.ends[kept], days=self.days,
+                       max_consec_days=self.max_consec_days)
+
+    def delete(self, n):
+        """Delete period n, like delete_period."""
+        self._check_index(n, self.periods - 1)
+        keep = np.ones(self.periods, dtype=bool)
+        keep[n] = False
+
+        return self.filter(keep)
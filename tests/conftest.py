@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+START = pd.Timestamp('2020-01-01')
+
+
+def random_hours(rng, n, days):
+    """n random hourly dates within days of START."""
+    return START + pd.to_timedelta(rng.integers(0, days * 24, n), unit='h')
+
+
+@pytest.fixture(scope='session')
+def random_events():
+    """
+    Factory of random events: random_events(rng, n, pids, days=100, **columns) gives n rows with a
+    'pid' below pids, an hourly '_dt' within days of 2020-01-01 and the given extra columns.
+    """
+    def make(rng, n, pids, days=100, **columns):
+        return pd.DataFrame({'pid': rng.integers(0, pids, n), '_dt': random_hours(rng, n, days), **columns})
+
+    return make
+
+
+@pytest.fixture(scope='session')
+def random_windows():
+    """
+    Factory of random windows: random_windows(rng, n, pids, days=80, max_days=30) gives n rows with a
+    'pid' below pids, an hourly 'start_dt' within days of 2020-01-01 and an 'end_dt' up to max_days later.
+    """
+    def make(rng, n, pids, days=80, max_days=30):
+        df = pd.DataFrame({'pid': rng.integers(0, pids, n), 'start_dt': random_hours(rng, n, days)})
+        df['end_dt'] = df.start_dt + pd.to_timedelta(rng.integers(0, max_days * 24, n), unit='h')
+        return df
+
+    return make
@@ -1,6 +1,7 @@
 import pandas as pd
 
-from libds.enrich import get_admission, get_admission_id
+from libds.enrich import get_admission, get_admission_id, get_admission_ids
+from libds.periods import PatientIntervalIndex
 
 b_admission = pd.read_excel("tests/fixtures/b_admissions.xlsx")
 
@@ -18,4 +19,33 @@ def test_get_admission_id():
     
     res = get_admission_id(b_admission, 13, pd.Timestamp("2019-03-30"), strict=False)
     assert res is None
-    
\ No newline at end of file
+    
+
+def test_get_admission_with_index():
+    index = PatientIntervalIndex(b_admission)
+    res = get_admission(index, 13, pd.Timestamp("2021-03-30"))
+    assert res["_id"] == 1
+
+    assert get_admission_id(index, 13, pd.Timestamp("2019-03-30"), strict=False) is None
+
+
+def test_get_admission_ids():
+    events = pd.DataFrame({
+        'pid': [13, 13, 13, 999],
+        '_dt': [pd.Timestamp("2021-03-30"), pd.Timestamp("2019-03-30"), pd.Timestamp("2021-03-30"), pd.Timestamp("2021-03-30")],
+    }, index=[5, 6, 7, 8])
+    ids, mask = get_admission_ids(events, b_admission)
+
+    assert ids.index.tolist() == [5, 6, 7, 8]
+    assert ids[5] == 1 and ids[7] == 1
+    assert pd.isna(ids[6]) and pd.isna(ids[8])
+    assert mask.tolist() == [False, True, False, True]
+
+
+def test_get_admission_ids_ambiguous():
+    overlapping = pd.concat([b_admission, b_admission.iloc[[1]].assign(_id=100)])
+    events = pd.DataFrame({'pid': [13], '_dt': [pd.Timestamp("2021-03-30")]})
+    ids, mask = get_admission_ids(events, overlapping)
+
+    assert pd.isna(ids[0])
+    assert mask[0]
@@ -0,0 +1,103 @@
+import functools
+import gc
+
+import pandas as pd
+import pytest
+
+from libds.enrich import EnrichmentCache, compute_all_penias, compute_rc
+from libds.enrich.cache import fingerprint
+
+df_rc = pd.DataFrame({
+    'pid': [1, 1, 2],
+    'type': ['TEMP_AXI', 'PULSIOX', 'TEMP_AXI'],
+    '_dt': pd.to_datetime(['2020-01-01', '2020-01-02', '2020-01-01']),
+    'value': [38., 95., 37.],
+})
+start_dt, end_dt = pd.Timestamp('2019-01-01'), pd.Timestamp('2021-01-01')
+
+
+def test_fingerprint():
+    assert fingerprint(df_rc) == fingerprint(df_rc.copy())
+    assert fingerprint(df_rc) != fingerprint(df_rc.iloc[::-1])
+    assert fingerprint(df_rc) != fingerprint(df_rc.assign(value=[38., 95., 36.]))
+
+
+def test_enrichment_cache():
+    cache = EnrichmentCache(maxsize=2)
+    cached_rc = cache.wrap(compute_rc)
+
+    res = cached_rc(df_rc, 1, start_dt, end_dt)
+    pd.testing.assert_series_equal(res, compute_rc(df_rc, 1, start_dt, end_dt))
+    res['TEMP_AXI_max'] = 0.
+    assert cached_rc(df_rc, 1, start_dt, end_dt)['TEMP_AXI_max'] == 38.
+    assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 2}
+
+    # Different parameters, patients and copies of the table
+    cached_rc(df_rc, 1, start_dt, end_dt, ['FC'], ['PULSIOX'])
+    cached_rc(df_rc.copy(), 1, start_dt, end_dt, rc_max=['FC'], rc_min=['PULSIOX'])
+    assert cache.stats()['misses'] == 3
+    cached_rc(df_rc.copy(), 1, start_dt, end_dt, rc_max=['FC'], rc_min=['PULSIOX'])
+    assert cache.hits == 2
+
+    # The least recently used result was evicted
+    assert len(cache) == 2
+    cached_rc(df_rc, 1, start_dt, end_dt)
+    assert cache.misses == 4
+
+    cache.call(compute_all_penias, df_rc.assign(desc='x'), 1, start_dt, end_dt)
+    assert cache.misses == 5
+
+
+def test_enrichment_cache_closures_and_partials():
+    def rc_max(types):
+        def f(df, pid, start_dt, end_dt):
+            return compute_rc(df, pid, start_dt, end_dt, types, [])
+        return f
+
+    cache = EnrichmentCache()
+    temp, fc = cache.wrap(rc_max(['TEMP_AXI'])), cache.wrap(rc_max(['FC']))
+    assert temp(df_rc, 1, start_dt, end_dt).to_dict() == {'TEMP_AXI_max': 38.}
+    assert fc(df_rc, 1, start_dt, end_dt).index.tolist() == ['FC_max']
+    assert cache.stats()['hits'] == 0
+
+    pulsiox = cache.wrap(functools.partial(compute_rc, rc_max=[], rc_min=['PULSIOX']))
+    assert pulsiox(df_rc, 1, start_dt, end_dt).to_dict() == {'PULSIOX_min': 95.}
+    assert pulsiox(df_rc, 1, start_dt, end_dt).to_dict() == {'PULSIOX_min': 95.}
+    assert cache.stats()['hits'] == 1
+
+
+def test_enrichment_cache_invalidate():
+    df = df_rc.copy()
+    cache = EnrichmentCache()
+    cached_rc = cache.wrap(compute_rc)
+
+    other = df_rc.iloc[:2]
+    cached_rc(df, 1, start_dt, end_dt)
+    cached_rc(other, 1, start_dt, end_dt)
+    df.loc[0, 'value'] = 40.
+    assert cached_rc(df, 1, start_dt, end_dt)['TEMP_AXI_max'] == 38.
+
+    cache.invalidate(df)
+    assert len(cache) == 1
+    assert cached_rc(df, 1, start_dt, end_dt)['TEMP_AXI_max'] == 40.
+
+    cache.invalidate()
+    assert len(cache) == 0
+    assert cache.stats()['hits'] == 1
+
+
+def test_enrichment_cache_forgets_collected_tables():
+    cache = EnrichmentCache()
+    df = df_rc.copy()
+    cache.fingerprint(df)
+    cache.fingerprint(df_rc)
+    assert len(cache._fingerprints) == 2
+
+    del df
+    gc.collect()
+    assert len(cache._fingerprints) == 1
+
+
+def test_enrichment_cache_maxsize():
+    with pytest.raises(ValueError):
+        EnrichmentCache(maxsize=0)
@@ -1,6 +1,6 @@
 import pandas as pd
 
-from libds.enrich import add_age
+from libds.enrich import add_age, add_ages, add_exitus_info, add_exitus_infos
 
 def test_add_age():
     res = add_age(pd.Timestamp("1979-08-22"), pd.Timestamp("2025-02-11"))
@@ -13,3 +13,36 @@ def test_empty_age():
 
     res = add_age(float('Nan'), pd.Timestamp("2025-02-11"))
     assert res.empty
+
+
+def test_add_ages():
+    birth_dt = pd.Series(pd.to_datetime(["1979-08-22", None, "2000-02-29"]), index=[3, 1, 2])
+    age, missing = add_ages(birth_dt, pd.Timestamp("2025-02-11"))
+
+    assert age.name == 'age'
+    assert age.index.tolist() == [3, 1, 2]
+    assert age[3] == 45
+    assert pd.isna(age[1])
+    assert age[2] == 24
+    assert missing.tolist() == [False, True, False]
+
+
+def test_add_ages_per_row_reference():
+    birth_dt = pd.Series(pd.to_datetime(["1979-08-22", "1979-08-22"]))
+    ref_dt = pd.Series(pd.to_datetime(["2025-02-11", "1989-08-21"]))
+    age, missing = add_ages(birth_dt, ref_dt)
+
+    assert age.tolist() == [45, 9]
+    assert not missing.any()
+
+
+def test_add_exitus_infos():
+    exitus_dt = pd.Series(pd.to_datetime(["2025-03-01", "2025-04-01", None, "2025-01-01"]))
+    res, missing = add_exitus_infos(exitus_dt, pd.Timestamp("2025-02-11"))
+
+    expected = add_exitus_info(exitus_dt[0], pd.Timestamp("2025-02-11"))
+    assert res.loc[0].tolist() == expected.tolist()
+    assert res.exitus_days.tolist()[:2] == [18, 49]
+    assert res.exitus_30d.tolist() == [True, False, False, True]
+    assert res.exitus_60d.tolist() == [True, True, False, True]
+    assert missing.tolist() == [False, False, True, False]
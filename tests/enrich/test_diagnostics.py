@@ -0,0 +1,72 @@
+import pandas as pd
+from scipy import sparse
+
+from libds.enrich.diagnostics import prep_diags_df, get_diags, get_diags_cohort
+from libds.periods import PatientIndex
+
+df_diags = pd.DataFrame({
+    'pid': [1, 1, 1, 2, 2],
+    'class': ['Diabetes', 'Asma', 'Diabetes', 'Asma', None],
+    '_dt': pd.to_datetime(['2020-01-01', '2020-02-01', '2020-03-01', '2020-01-01', '2020-01-01']),
+})
+cohort = pd.DataFrame({
+    'pid': [1, 1, 2, 3],
+    'start_dt': pd.to_datetime(['2020-01-15', None, None, None]),
+    'end_dt': pd.to_datetime(['2020-03-01', '2020-01-15', '2020-12-31', '2020-12-31']),
+}, index=['a', 'b', 'c', 'd'])
+
+
+def test_prep_diags_df():
+    df = pd.DataFrame({
+        'pid': [1, 2, 3, 4],
+        'class': ['Asma, Diabetes', None, ' Asma', 'Diabetes ,EPOC,Asma'],
+        '_dt': pd.to_datetime(['2020-01-01', '2020-01-02', '2020-01-03', '2020-01-04']),
+    }, index=[7, 5, 3, 1])
+    res = prep_diags_df(df)
+
+    assert res.index.tolist() == list(range(7))
+    assert res.columns.tolist() == ['pid', 'class', '_dt']
+    assert res.pid.tolist() == [1, 1, 2, 3, 4, 4, 4]
+    assert isinstance(res['class'].dtype, pd.CategoricalDtype)
+    assert res['class'].cat.categories.tolist() == ['Asma', 'Diabetes', 'EPOC']
+    assert res['class'].tolist()[:2] == ['Asma', 'Diabetes']
+    assert res['class'].tolist()[3:] == ['Asma', 'Diabetes', 'EPOC', 'Asma']
+    assert pd.isna(res['class'].iloc[2])
+    assert df['class'].tolist()[0] == 'Asma, Diabetes'
+
+    res = get_diags(res, 4, pd.Timestamp('2020-12-31'))
+    assert res.to_dict() == {'a_Asma': True, 'a_Diabetes': True, 'a_EPOC': True}
+
+
+def test_get_diags():
+    res = get_diags(df_diags, 1, pd.Timestamp('2020-03-01'), pd.Timestamp('2020-01-15'), suffix='_x')
+    assert res.to_dict() == {'a_Asma_x': True, 'a_Diabetes_x': True}
+
+    res = get_diags(PatientIndex(df_diags), 1, pd.Timestamp('2020-03-01'), pd.Timestamp('2020-01-15'), suffix='_x')
+    assert res.to_dict() == {'a_Asma_x': True, 'a_Diabetes_x': True}
+    res = get_diags(PatientIndex(df_diags), 1, pd.Timestamp('2020-01-15'))
+    assert res.to_dict() == {'a_Diabetes': True}
+
+
+def test_get_diags_cohort():
+    res = get_diags_cohort(df_diags, cohort, suffix='_x')
+
+    assert res.columns.tolist() == ['a_Asma_x', 'a_Diabetes_x']
+    assert res.index.tolist() == ['a', 'b', 'c', 'd']
+    assert (res.dtypes == pd.SparseDtype(bool, False)).all()
+
+    dense = res.sparse.to_dense()
+    assert dense['a_Asma_x'].tolist() == [True, False, True, False]
+    assert dense['a_Diabetes_x'].tolist() == [True, True, False, False]
+
+    expected = get_diags(df_diags, 1, pd.Timestamp('2020-03-01'), pd.Timestamp('2020-01-15'), suffix='_x')
+    assert dense.loc['a', expected.index].tolist() == expected.tolist()
+
+
+def test_get_diags_cohort_matrix():
+    matrix, columns = get_diags_cohort(df_diags, cohort, as_matrix=True)
+
+    assert sparse.issparse(matrix)
+    assert matrix.shape == (4, 2)
+    assert matrix.nnz == 4
+    assert columns == ['a_Asma', 'a_Diabetes']
@@ -0,0 +1,84 @@
+import pandas as pd
+
+from libds.enrich.lab import internal_compute_periods, compute_all_penias, compute_all_penias_cohort
+from libds.periods import PatientIndex
+
+df = pd.DataFrame({
+    'pid': [1, 1, 1, 1, 2],
+    'desc': ['Neutròfils'] * 5,
+    '_dt': pd.to_datetime(['2020-01-05', '2020-01-01', '2020-01-02', '2020-01-04', '2020-01-01']),
+    'value': [0.9, 0.6, 0.2, 0.3, 0.1],
+})
+
+
+def test_internal_compute_periods():
+    res = internal_compute_periods(df, 1, pd.Timestamp('2019-01-01'), pd.Timestamp('2021-01-01'), 0.5, 'n_')
+
+    assert res['n_days'] == 3
+    assert res['n_periods'] == 1
+    assert res['n_starts'].tolist() == [1]
+    assert res['n_ends'].tolist() == [3]
+
+
+def test_internal_compute_periods_empty_window():
+    res = internal_compute_periods(df, 1, pd.Timestamp('2021-01-01'), pd.Timestamp('2022-01-01'), 0.5, 'n_')
+    assert res == dict()
+
+
+def test_compute_all_penias():
+    res = compute_all_penias(df, 1, pd.Timestamp('2019-01-01'), pd.Timestamp('2021-01-01'))
+
+    assert res['neutropenia_days'] == 3
+    assert res['neutropenia_sever_days'] == 0
+
+    expected = res
+    res = compute_all_penias(PatientIndex(df), 1, pd.Timestamp('2019-01-01'), pd.Timestamp('2021-01-01'))
+    assert res.index.tolist() == expected.index.tolist()
+    assert res['neutropenia_days'] == 3
+    assert res['neutropenia_starts'].tolist() == expected['neutropenia_starts'].tolist()
+
+
+def test_compute_all_penias_cohort():
+    cohort = pd.DataFrame({
+        'pid': [1, 2, 3],
+        'start_dt': pd.to_datetime(['2019-01-01', '2019-01-01', '2019-01-01']),
+        'end_dt': pd.to_datetime(['2021-01-01', '2021-01-01', '2021-01-01']),
+    }, index=[10, 20, 30])
+    res = compute_all_penias_cohort(df, cohort)
+
+    assert res.index.tolist() == [10, 20, 30]
+    assert res.loc[10, 'neutropenia_days'] == 3
+    assert res.loc[20, 'neutropenia_sever_days'] == 0
+    assert pd.isna(res.loc[30, 'neutropenia_days'])
+
+    expected = compute_all_penias(df, 1, pd.Timestamp('2019-01-01'), pd.Timestamp('2021-01-01'))
+    assert res.loc[10, 'neutropenia_periods'] == expected['neutropenia_periods']
+
+
+def test_compute_all_penias_cohort_thresholds():
+    cohort = pd.DataFrame({
+        'pid': [1, 2],
+        'start_dt': pd.to_datetime(['2019-01-01', '2019-01-01']),
+        'end_dt': pd.to_datetime(['2021-01-01', '2021-01-01']),
+    })
+    penias = pd.DataFrame({
+        'desc': ['Neutròfils', 'Neutròfils', 'Neutròfils'],
+        'threshold': [0.25, 0.5, 1.0],
+        'prefix': ['n25_', 'n50_', 'n100_'],
+    })
+    res, periods = compute_all_penias_cohort(df, cohort, return_periods=True, penias=penias)
+
+    assert res.columns.tolist()[:3] == ['n25_days', 'n25_periods', 'n25_max_consec_days']
+    assert res['n25_days'].tolist() == [1, 1]
+    assert res['n50_days'].tolist() == [3, 1]
+    assert res['n100_days'].tolist() == [5, 1]
+
+    assert periods['n50_'].columns.tolist() == ['row', 'n50_period', 'n50_interval', 'n50_duration',
+                                                'n50_start', 'n50_end']
+    assert periods['n50_'].n50_start.tolist() == [1, 0]
+    assert periods['n25_'].row.tolist() == [0, 1]
+
+    for i, row in enumerate(cohort.itertuples()):
+        expected = compute_all_penias(df, row.pid, row.start_dt, row.end_dt, penias=penias)
+        assert res.loc[i, 'n100_days'] == expected['n100_days']
+        assert expected.index.tolist()[:3] == ['n25_days', 'n25_periods', 'n25_max_consec_days']
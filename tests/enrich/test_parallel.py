@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from libds.enrich import EnrichmentPipeline, compute_rc_cohort
+from libds.enrich.diagnostics import get_diags_cohort
+from libds.enrich.parallel import parallel_enrich, patient_shards
+
+
+@pytest.fixture(scope='module')
+def data(random_events, random_windows):
+    """(rc, lab, cohort) shared by the tests of the module."""
+    rng = np.random.default_rng(0)
+    n = 2000
+    rc = random_events(rng, n, 100, type=rng.choice(['TEMP_AXI', 'FC', 'PULSIOX'], n), value=rng.random(n) * 100)
+    lab = rc.assign(desc=rng.choice(['Neutròfils', 'Limfòcits'], n), value=rng.random(n) * 1.5)
+    cohort = random_windows(rng, 300, 110)
+    cohort.index = rng.permutation(300)
+
+    return rc, lab, cohort
+
+
+def test_patient_shards(data):
+    _, _, cohort = data
+    shards = patient_shards(cohort.pid, 7)
+
+    assert shards.min() >= 0 and shards.max() < 7
+    assert (shards == patient_shards(cohort.pid.to_numpy(), 7)).all()
+    # A patient is always in the same shard
+    assert (pd.Series(shards).groupby(cohort.pid.to_numpy()).nunique() == 1).all()
+
+
+def test_parallel_enrich(data):
+    rc, _, cohort = data
+    expected = compute_rc_cohort(rc, cohort)
+    res = parallel_enrich(compute_rc_cohort, cohort, {'df_rc': rc}, max_workers=2, shard_size=50)
+
+    pd.testing.assert_frame_equal(res, expected)
+
+
+def test_parallel_enrich_mixed_pid_dtypes(data):
+    rc, _, cohort = data
+    # Float cohort ids (as after a merge with missing values) match the int ids of the events
+    float_cohort = cohort.astype({'pid': float})
+    expected = compute_rc_cohort(rc, float_cohort)
+    res = parallel_enrich(compute_rc_cohort, float_cohort, {'df_rc': rc}, max_workers=2, shard_size=50)
+
+    assert expected.notna().sum().sum() > 0
+    pd.testing.assert_frame_equal(res, expected)
+
+
+def test_parallel_enrich_pipeline(data):
+    rc, lab, cohort = data
+    pipeline = EnrichmentPipeline([
+        ('rc', 'rc', {'rc_max': ['FC'], 'rc_min': ['PULSIOX']}),
+        ('penias', 'lab'),
+        ('diags', 'rc', {'classes': ['FC', 'TEMP_AXI']}),
+    ], {'rc': rc.assign(**{'class': rc.type}), 'lab': lab})
+
+    res = parallel_enrich(pipeline, cohort, max_workers=2, shard_size=50)
+    pd.testing.assert_frame_equal(res, pipeline.run(cohort))
+
+
+def test_parallel_enrich_different_columns(data):
+    _, _, cohort = data
+    diags = pd.DataFrame({'pid': cohort.pid, 'class': cohort.pid.astype(str), '_dt': cohort.start_dt})
+
+    with pytest.raises(ValueError):
+        parallel_enrich(get_diags_cohort, cohort, {'df_diags': diags}, max_workers=2, shard_size=50)
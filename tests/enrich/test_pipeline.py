@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+from libds.enrich import EnrichmentPipeline, add_age, compute_rc, compute_rc_cohort
+from libds.enrich import windows as windows_module
+from libds.enrich.diagnostics import get_diags, get_diags_cohort
+
+admissions = pd.DataFrame({
+    '_id': [100, 101, 200],
+    'pid': [1, 1, 2],
+    'start_dt': pd.to_datetime(['2020-01-01', '2020-02-01', '2020-01-01']),
+    'end_dt': pd.to_datetime(['2020-01-10', '2020-02-10', '2020-01-31']),
+})
+rc = pd.DataFrame({
+    'pid': [1, 1, 2],
+    'type': ['TEMP_AXI', 'PULSIOX', 'TEMP_AXI'],
+    '_dt': pd.to_datetime(['2020-01-02', '2020-01-03', '2020-01-05']),
+    'value': [38.5, 93., 37.],
+})
+lab = pd.DataFrame({
+    'pid': [1, 1, 2],
+    'desc': ['Neutròfils', 'Neutròfils', 'Limfòcits'],
+    '_dt': pd.to_datetime(['2020-01-02', '2020-01-03', '2020-01-05']),
+    'value': [0.3, 0.4, 0.8],
+})
+diags = pd.DataFrame({
+    'pid': [1, 2],
+    'class': ['Asma', 'EPOC'],
+    '_dt': pd.to_datetime(['2019-01-01', '2019-06-01']),
+})
+patients = pd.DataFrame({
+    'pid': [1, 2],
+    'birth_dt': pd.to_datetime(['1950-01-15', '1980-06-01']),
+    'exitus_dt': pd.to_datetime(['2020-01-20', None]),
+})
+cohort = pd.DataFrame({
+    'pid': [1, 2, 3],
+    'start_dt': pd.to_datetime(['2020-01-02', '2020-01-04', '2020-01-04']),
+    'end_dt': pd.to_datetime(['2020-01-05', '2020-01-10', '2020-01-10']),
+}, index=[10, 20, 30])
+sources = {'admissions': admissions, 'rc': rc, 'lab': lab, 'diags': diags, 'patients': patients}
+
+
+def test_enrichment_pipeline():
+    pipeline = EnrichmentPipeline([
+        ('admission', 'admissions'),
+        ('rc', 'rc', {'rc_max': ['TEMP_AXI'], 'rc_min': ['PULSIOX']}),
+        ('penias', 'lab'),
+        ('diags', 'diags', {'start_col': None}),
+        ('age', 'patients'),
+        ('exitus', 'patients'),
+    ], sources)
+    res = pipeline.run(cohort)
+
+    assert res.index.tolist() == [10, 20, 30]
+    assert res.admission_id.tolist()[:2] == [100, 200]
+    assert pd.isna(res.admission_id[30])
+
+    expected = compute_rc(rc, 1, cohort.start_dt[10], cohort.end_dt[10], ['TEMP_AXI'], ['PULSIOX'])
+    assert [res.TEMP_AXI_max[10], res.PULSIOX_min[10]] == expected.tolist()
+
+    assert res.neutropenia_days[10] == 2
+    assert pd.isna(res.neutropenia_days[20])
+    assert res.limfopenia_days[20] == 1
+
+    expected = get_diags(diags, 2, cohort.end_dt[20])
+    assert res.a_EPOC[20] == expected['a_EPOC']
+    assert not res.a_Asma[20]
+
+    assert res.age[10] == add_age(patients.birth_dt[0], cohort.start_dt[10])['age']
+    assert pd.isna(res.age[30])
+    assert res.exitus_days[10] == 18
+    assert res.exitus_30d.tolist() == [True, False, False]
+
+
+def test_enrichment_pipeline_sorts_sources_once(monkeypatch):
+    sorts = []
+    grouped_times = windows_module.GroupedTimes
+    monkeypatch.setattr(windows_module, 'GroupedTimes', lambda *args: sorts.append(1) or grouped_times(*args))
+
+    res = EnrichmentPipeline([
+        ('diags', 'diags', {'suffix': '_prev', 'start_col': None}),
+        ('diags', 'diags', {'classes': ['Asma', 'EPOC']}),
+        ('rc', 'rc', {'rc_max': ['TEMP_AXI'], 'rc_min': []}),
+        ('rc', 'rc', {'rc_max': [], 'rc_min': ['PULSIOX']}),
+    ], sources).run(cohort)
+
+    # One sort for diags, one for rc
+    assert len(sorts) == 2
+    expected = pd.concat([
+        get_diags_cohort(diags, cohort, '_prev', start_col=None),
+        get_diags_cohort(diags, cohort, classes=['Asma', 'EPOC']),
+        compute_rc_cohort(rc, cohort, ['TEMP_AXI'], []),
+        compute_rc_cohort(rc, cohort, [], ['PULSIOX']),
+    ], axis=1)
+    pd.testing.assert_frame_equal(res, expected)
+
+
+def test_enrichment_pipeline_custom_function():
+    def n_events(df_cohort, source):
+        return df_cohort[['pid']].assign(n=df_cohort.pid.map(source.pid.value_counts())).drop(columns='pid')
+
+    res = EnrichmentPipeline([('age', None, {'birth_col': 'start_dt'}), (n_events, 'rc')], sources).run(cohort)
+
+    assert res.columns.tolist() == ['age', 'n']
+    assert res.age.tolist() == [0, 0, 0]
+    assert res.n.tolist()[:2] == [2, 1]
+
+
+def test_enrichment_pipeline_unknown():
+    with pytest.raises(ValueError):
+        EnrichmentPipeline([('unknown', 'rc')], sources)
+
+    with pytest.raises(ValueError):
+        EnrichmentPipeline([('rc', 'vitals')], sources)
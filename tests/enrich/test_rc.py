@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+
+from libds.enrich.rc import compute_rc, compute_rc_cohort
+from libds.periods import PatientIndex
+
+df_rc = pd.DataFrame({
+    'pid': [1, 1, 1, 1, 2, 2],
+    'type': ['TEMP_AXI', 'TEMP_AXI', 'PULSIOX', 'PULSIOX', 'FC', 'PULSIOX'],
+    '_dt': pd.to_datetime(['2020-01-01', '2020-01-03', '2020-01-02', '2020-01-05', '2020-01-01', '2020-01-01']),
+    'value': [37.5, 39.0, 95., 90., 80., 97.],
+})
+cohort = pd.DataFrame({
+    'pid': [1, 2, 3],
+    'start_dt': pd.to_datetime(['2020-01-01', '2020-01-01', '2020-01-01']),
+    'end_dt': pd.to_datetime(['2020-01-04', '2020-01-31', '2020-01-31']),
+}, index=[10, 20, 30])
+
+
+def test_compute_rc():
+    res = compute_rc(df_rc, 1, pd.Timestamp('2020-01-01'), pd.Timestamp('2020-01-04'))
+
+    assert res['TEMP_AXI_max'] == 39.0
+    assert res['PULSIOX_min'] == 95.
+    assert np.isnan(res['FC_max'])
+
+    expected = res
+    res = compute_rc(PatientIndex(df_rc), 1, pd.Timestamp('2020-01-01'), pd.Timestamp('2020-01-04'))
+    pd.testing.assert_series_equal(res, expected)
+
+
+def test_compute_rc_cohort():
+    res = compute_rc_cohort(df_rc, cohort)
+
+    assert res.columns.tolist() == ['TEMP_AXI_max', 'FC_max', 'FREC_RESP_max', 'PULSIOX_min']
+    assert res.index.tolist() == [10, 20, 30]
+    assert res.loc[10, 'TEMP_AXI_max'] == 39.0
+    assert res.loc[10, 'PULSIOX_min'] == 95.
+    assert res.loc[20, 'FC_max'] == 80.
+    assert res.loc[30].isna().all()
+
+
+def test_compute_rc_cohort_matches_compute_rc(random_events, random_windows):
+    rng = np.random.default_rng(0)
+    n = 2000
+    df = random_events(rng, n, 20, type=pd.Categorical(rng.choice(['TEMP_AXI', 'FC', 'PULSIOX', 'OTHER'], n)),
+                       value=rng.random(n) * 100)
+    df_cohort = random_windows(rng, 40, 25)
+
+    res = compute_rc_cohort(df, df_cohort, rc_max=['TEMP_AXI', 'FC'], rc_min=['PULSIOX', 'FC'])
+    expected = df_cohort.apply(
+        lambda row: compute_rc(df, row.pid, row.start_dt, row.end_dt, ['TEMP_AXI', 'FC'], ['PULSIOX', 'FC']),
+        axis=1,
+    )
+    pd.testing.assert_frame_equal(res, expected.astype(float))
@@ -0,0 +1,98 @@
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from libds.enrich import compute_rc_cohort
+from libds.enrich.parallel import _split, _split_shared, parallel_enrich
+from libds.enrich.shared import SharedEvents
+
+events = pd.DataFrame({
+    'pid': [3, 1, 2, 1],
+    '_dt': pd.to_datetime(['2020-01-01', None, '2020-01-03', '2020-01-02']),
+    'type': pd.Categorical(['TEMP_AXI', 'FC', None, 'FC']),
+    'desc': ['x', 'y', 'x', 'z'],
+    'value': [37.5, 80., np.nan, 90.],
+})
+
+
+def test_shared_events():
+    with SharedEvents(events) as shared:
+        assert len(shared) == 4
+        assert shared.columns == ['pid', '_dt', 'type', 'desc', 'value']
+        assert shared.arrays['_dt'].dtype == np.int64
+        assert shared.arrays['type'].tolist() == [1, 0, -1, 0]
+        assert shared.categories['type'].tolist() == ['FC', 'TEMP_AXI']
+        assert list(shared.values('desc')) == ['x', 'y', 'x', 'z']
+
+        pd.testing.assert_frame_equal(shared.to_frame(), events)
+        pd.testing.assert_frame_equal(shared.to_frame([1, 3]), events.iloc[[1, 3]].reset_index(drop=True))
+
+
+def test_shared_events_pickle():
+    with SharedEvents(events, columns=['pid', 'value']) as shared:
+        data = pickle.dumps(shared)
+        assert len(data) < 1000
+
+        view = pickle.loads(data)
+        assert view.arrays['value'].tolist()[:2] == [37.5, 80.]
+        with pytest.raises(ValueError):
+            view.arrays['value'][0] = 0.
+        with pytest.raises(ValueError):
+            view.unlink()
+
+        frame = view.to_frame()
+        frame.loc[0, 'value'] = 0.
+        assert shared.arrays['value'][0] == 37.5
+        view.close()
+
+
+def test_shared_events_timezone():
+    df = events.assign(_dt=events._dt.dt.tz_localize('Europe/Madrid'))
+    with SharedEvents(df) as shared:
+        pd.testing.assert_frame_equal(shared.to_frame(), df)
+
+
+def test_parallel_enrich_shared_events(random_events, random_windows):
+    rng = np.random.default_rng(0)
+    n = 2000
+    rc = random_events(rng, n, 100, type=pd.Categorical(rng.choice(['TEMP_AXI', 'FC', 'PULSIOX'], n)),
+                       value=rng.random(n) * 100)
+    cohort = random_windows(rng, 300, 110)
+
+    with SharedEvents(rc) as shared:
+        res = parallel_enrich(compute_rc_cohort, cohort, {'df_rc': shared}, max_workers=2, shard_size=50)
+
+    pd.testing.assert_frame_equal(res, compute_rc_cohort(rc, cohort))
+
+
+def test_split_shared_matches_split():
+    df = events.assign(pid=['c', 'a', None, 'a'])
+    pids = pd.Index(['a', 'b', 'c'])
+    patients = pd.Series([0, 0, 1], index=pids)
+
+    with SharedEvents(df) as shared:
+        shards, order = _split_shared(shared, 'pid', patients, 2)
+        try:
+            # Rows sorted by shard, the row without a patient is left out
+            assert order.arrays['row'][shards[0].lo:shards[1].hi].tolist() == [1, 3, 0]
+            for shard, expected in zip(shards, _split(df, 'pid', patients, 2)):
+                pd.testing.assert_frame_equal(shard.to_frame(), expected.reset_index(drop=True))
+        finally:
+            order.close()
+            order.unlink()
+
+
+def test_parallel_enrich_shared_events_string_pids(random_events, random_windows):
+    rng = np.random.default_rng(1)
+    n = 1000
+    rc = random_events(rng, n, 50, type=rng.choice(['TEMP_AXI', 'PULSIOX'], n), value=rng.random(n) * 100)
+    rc['pid'] = rc.pid.astype(str)
+    cohort = random_windows(rng, 200, 60)
+    cohort['pid'] = cohort.pid.astype(str)
+
+    with SharedEvents(rc) as shared:
+        res = parallel_enrich(compute_rc_cohort, cohort, {'df_rc': shared}, max_workers=2, shard_size=50)
+
+    pd.testing.assert_frame_equal(res, compute_rc_cohort(rc, cohort))
@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+
+from libds.enrich.windows import EventWindows
+
+events = pd.DataFrame({
+    'pid': [1, 1, 1, 2, 2, 1],
+    '_dt': pd.to_datetime(['2020-01-05', '2020-01-01', '2020-01-03', '2020-01-02', None, '2020-01-03']),
+    'value': [5., 1., 3., 2., 9., 4.],
+})
+cohort = pd.DataFrame({
+    'pid': [1, 1, 2, 3, 1],
+    'start_dt': pd.to_datetime(['2020-01-02', None, '2020-01-01', '2020-01-01', '2020-01-04']),
+    'end_dt': pd.to_datetime(['2020-01-05', '2020-01-03', '2020-01-31', '2020-01-31', '2020-01-02']),
+}, index=['a', 'b', 'c', 'd', 'e'])
+
+
+def test_event_windows_ranges():
+    windows = EventWindows(events, cohort)
+
+    assert windows.events.value.tolist() == [1., 3., 4., 5., 2.]
+    assert len(windows) == 5
+    assert windows.lengths.tolist() == [3, 3, 1, 0, 0]
+
+    ranges = windows.ranges()
+    assert ranges.index.tolist() == ['a', 'b', 'c', 'd', 'e']
+    assert ranges.lo.tolist()[:3] == [1, 0, 4]
+
+
+def test_event_windows_no_start():
+    windows = EventWindows(events, cohort, start_col=None)
+    assert windows.lengths.tolist() == [4, 3, 1, 0, 1]
+
+
+def test_event_windows_shared_events():
+    index = EventWindows(events)
+    assert len(index) == 0
+
+    windows = index.windows(cohort, start_col=None)
+    assert windows.events is index.events
+    assert windows.lengths.tolist() == EventWindows(events, cohort, start_col=None).lengths.tolist()
+    assert EventWindows(index, cohort).lengths.tolist() == [3, 3, 1, 0, 0]
+
+
+def test_event_windows_take():
+    res = EventWindows(events, cohort).take()
+
+    assert res.row.tolist() == [0, 0, 0, 1, 1, 1, 2]
+    assert res.value.tolist() == [3., 4., 5., 1., 3., 4., 2.]
+
+
+def test_event_windows_reduce():
+    windows = EventWindows(events, cohort)
+
+    res = windows.reduce('value', np.fmax)
+    np.testing.assert_array_equal(res, [5., 4., 2., np.nan, np.nan])
+
+    res = windows.reduce(np.ones(len(windows.events), dtype=np.int64), np.add, fill=0)
+    assert res.tolist() == [3, 3, 1, 0, 0]
+
+
+def test_event_windows_matches_filter(random_events, random_windows):
+    rng = np.random.default_rng(0)
+    df = random_events(rng, 1000, 20, value=rng.random(1000))
+    df_cohort = random_windows(rng, 50, 25)
+
+    windows = EventWindows(df, df_cohort)
+    res = windows.reduce('value', np.fmin)
+    for i, row in enumerate(df_cohort.itertuples()):
+        selected = df[(df.pid == row.pid) & (df._dt >= row.start_dt) & (df._dt <= row.end_dt)]
+        assert windows.lengths[i] == len(selected)
+        if len(selected):
+            assert res[i] == selected.value.min()
@@ -1,7 +1,8 @@
 import unittest
 import pandas as pd
 from datetime import datetime
-from libds.misc.find_closest_event import find_closest_event
+from libds.misc.find_closest_event import find_closest_event, find_closest_events
+from libds.periods import PatientIndex
 
 
 class TestFindClosestEvent(unittest.TestCase):
@@ -38,6 +39,42 @@ class TestFindClosestEvent(unittest.TestCase):
         self.assertTrue(result["test_"])
         self.assertEqual(result["test_days"], 1)
 
+    def test_find_closest_event_patient_index(self):
+        patients = PatientIndex(self.df)
+        for inclusive in [True, False]:
+            for pid, _dt in [(1, datetime(2023, 1, 5)), (1, datetime(2022, 12, 31)), (3, datetime(2023, 1, 4))]:
+                result = find_closest_event(patients, pid, _dt, inclusive=inclusive)
+                expected = find_closest_event(self.df, pid, _dt, inclusive=inclusive)
+                pd.testing.assert_series_equal(result, expected)
+
+    def test_find_closest_events_matches_apply(self):
+        df_ref = pd.DataFrame({
+            "pid": [1, 1, 2, 3],
+            "_dt": [datetime(2023, 1, 5), datetime(2022, 12, 31), datetime(2023, 1, 4), datetime(2023, 1, 4)],
+        }, index=[10, 11, 12, 13])
+
+        for inclusive in [True, False]:
+            expected = df_ref.apply(lambda r: find_closest_event(self.df, r.pid, r._dt, inclusive, "test"), axis=1)
+            result = find_closest_events(df_ref, self.df, inclusive=inclusive, prefix="test")
+            pd.testing.assert_frame_equal(result, expected)
+
+    def test_find_closest_events_nat_event(self):
+        df = pd.DataFrame({"pid": [1, 1], "_dt": [datetime(2023, 1, 1), pd.NaT]})
+        df_ref = pd.DataFrame({"pid": [1, 1], "_dt": [datetime(2022, 12, 1), datetime(2023, 1, 2)]})
+
+        for inclusive in [True, False]:
+            expected = df_ref.apply(lambda r: find_closest_event(df, r.pid, r._dt, inclusive), axis=1)
+            result = find_closest_events(df_ref, df, inclusive=inclusive)
+            pd.testing.assert_frame_equal(result, expected)
+            self.assertFalse(result.loc[0, "_"])
+
+    def test_find_closest_events_all_found(self):
+        df_ref = pd.DataFrame({"pid": [1, 2], "_dt": [datetime(2023, 1, 5), datetime(2023, 1, 4)]})
+        result = find_closest_events(df_ref, self.df)
+
+        self.assertEqual(result["_days"].tolist(), [4, 1])
+        self.assertEqual(result["_days"].dtype, "int64")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import pandas as pd
+from datetime import datetime
+from libds.misc.nearest_events import nearest_events
+
+
+class TestNearestEvents(unittest.TestCase):
+
+    def setUp(self):
+        data = {
+            "pid": [1, 1, 1, 1, 2],
+            "_dt": [
+                datetime(2023, 1, 1),
+                datetime(2023, 1, 20),
+                datetime(2023, 1, 28),
+                datetime(2023, 2, 10),
+                datetime(2023, 1, 3),
+            ],
+        }
+        self.df = pd.DataFrame(data)
+        self.df_ref = pd.DataFrame({
+            "pid": [1, 3],
+            "_dt": [datetime(2023, 1, 28), datetime(2023, 1, 28)],
+        })
+
+    def test_previous_and_next(self):
+        result = nearest_events(self.df_ref, self.df, k=2, horizons=[], prefix="lab")
+
+        self.assertEqual(result.loc[0, "lab_prev1_days"], 0)
+        self.assertEqual(result.loc[0, "lab_prev2_days"], 8)
+        self.assertEqual(result.loc[0, "lab_next1_days"], 13)
+        self.assertTrue(pd.isna(result.loc[0, "lab_next2_days"]))
+        self.assertTrue(pd.isna(result.loc[1, "lab_prev1_days"]))
+
+    def test_exclusive(self):
+        result = nearest_events(self.df_ref, self.df, k=1, horizons=[], inclusive=False)
+
+        self.assertEqual(result.loc[0, "_prev1_days"], 8)
+        self.assertEqual(result.loc[0, "_next1_days"], 0)
+
+    def test_horizon_counts(self):
+        result = nearest_events(self.df_ref, self.df, k=1, horizons=[7, 30])
+
+        self.assertEqual(result["_7d"].tolist(), [1, 0])
+        self.assertEqual(result["_30d"].tolist(), [3, 0])
+
+    def test_nat_events_are_ignored(self):
+        df = pd.concat([self.df, pd.DataFrame({"pid": [3], "_dt": [pd.NaT]})], ignore_index=True)
+        result = nearest_events(self.df_ref, df, k=1, horizons=[7])
+
+        self.assertTrue(pd.isna(result.loc[1, "_prev1_days"]))
+        self.assertTrue(pd.isna(result.loc[1, "_next1_days"]))
+        self.assertEqual(result["_7d"].tolist(), [1, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
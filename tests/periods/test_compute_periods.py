@@ -1,4 +1,7 @@
-from libds.periods import compute_periods
+import numpy as np
+import pandas as pd
+
+from libds.periods import compute_periods, compute_periods_grouped
 
 
 def makebool(s):
@@ -89,3 +92,53 @@ def test_return_max_consec_days():
 
     res = compute_periods(makebool('FFFFFFFFF'))
     assert res['max_consec_days'] == 0
+
+
+def test_accepts_arrays_and_series():
+    expected = compute_periods(makebool('FTTFTTTF'))
+    assert compute_periods(np.array(makebool('FTTFTTTF'))) == expected
+    assert compute_periods(pd.Series(makebool('FTTFTTTF'))) == expected
+
+
+def test_as_array():
+    res = compute_periods(makebool('TFFTTF'), as_array=True)
+    assert isinstance(res['starts'], np.ndarray)
+    assert res['intervals'].tolist() == [0, 2]
+    assert res['durations'].tolist() == [1, 2]
+    assert res['starts'].tolist() == [0, 3]
+    assert res['ends'].tolist() == [0, 4]
+
+
+def test_empty_states():
+    res = compute_periods([])
+    assert res['days'] == 0
+    assert res['periods'] == 0
+    assert res['max_consec_days'] == 0
+    assert res['starts'] == []
+
+
+def test_grouped_matches_compute_periods():
+    df = pd.DataFrame({
+        'pid': [1] * 6 + [2] * 4,
+        'ordinal': list(range(6)) + list(range(4)),
+        'state': makebool('TFFTTF') + makebool('FFFF'),
+    })
+    res, periods = compute_periods_grouped(df, prefix='fever_', return_periods=True)
+
+    assert res.loc[1, 'fever_days'] == 3
+    assert res.loc[1, 'fever_periods'] == 2
+    assert res.loc[1, 'fever_max_consec_days'] == 2
+    assert res.loc[2].tolist() == [0, 0, 0]
+    assert periods.pid.tolist() == [1, 1]
+    assert periods.fever_interval.tolist() == [0, 2]
+    assert periods.fever_start.tolist() == [0, 3]
+    assert periods.fever_end.tolist() == [0, 4]
+
+
+def test_grouped_fills_gaps_between_true_days():
+    # Day 2 is missing: filled True between two True days, False otherwise
+    df = pd.DataFrame({'pid': [1, 1, 1, 2, 2], 'ordinal': [5, 6, 8, 0, 2], 'state': [True, True, True, True, False]})
+    res = compute_periods_grouped(df)
+
+    assert res.loc[1].tolist() == [4, 1, 4]
+    assert res.loc[2].tolist() == [1, 1, 1]
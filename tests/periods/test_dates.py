@@ -1,7 +1,8 @@
 import pandas as pd
 from datetime import datetime
 
-from libds.periods import get_closest_event, unify_dates, dates_to_ordinal_with_values
+from libds.periods import (get_closest_event, get_closest_events, unify_dates, dates_to_ordinal,
+                           dates_to_ordinal_with_values, dates_to_ordinal_grouped, df_fill_period, expand_days)
 
 dates = [datetime(2020, 1, 1), 
          datetime(2020, 1, 11), 
@@ -46,6 +47,47 @@ def test_get_closest_event_days_after():
     assert res["_dt"] == datetime(2020, 1, 21)
 
 
+def test_get_closest_events():
+    queries = pd.DataFrame({
+        "pid": [1, 1, 1, 1, 2],
+        "admission_id": [1, 2, 1, 1, 1],
+        "_dt": [datetime(2020, 1, 2), datetime(2020, 3, 1), datetime(2020, 1, 20), datetime(2021, 1, 1), datetime(2020, 1, 2)],
+    }, index=list("abcde"))
+    res = get_closest_events(df, queries)
+
+    assert res.index.tolist() == list("abcde")
+    assert res.loc["a", "_id"] == 0
+    # Same admission is always eligible
+    assert res.loc["b", "_id"] == 3
+    assert res.loc["c", "_id"] == 1
+    assert res.loc["d", "_id"] == 2
+    assert pd.isna(res.loc["e", "_id"])
+    assert res.loc["a", "distance"] == 86400
+
+    res = get_closest_events(df, queries, days_after=3)
+    assert res.loc["c", "_id"] == 2
+
+
+def test_get_closest_events_no_events():
+    queries = pd.DataFrame({"pid": [1, 2], "admission_id": [1, 1], "_dt": [datetime(2020, 1, 2)] * 2})
+    res = get_closest_events(df.iloc[:0], queries)
+
+    assert get_closest_event(df.iloc[:0], 1, 1, datetime(2020, 1, 2)) is None
+    assert res.index.tolist() == [0, 1]
+    assert res["_id"].isna().all()
+    assert res["distance"].isna().all()
+
+
+def test_get_closest_events_nat_event():
+    events = pd.concat([df, pd.DataFrame({"_id": [4], "pid": [2], "admission_id": [3], "_dt": [pd.NaT]})])
+    queries = pd.DataFrame({"pid": [1, 2], "admission_id": [1, 3], "_dt": [datetime(2020, 1, 2), datetime(2020, 1, 2)]})
+    res = get_closest_events(events, queries)
+
+    assert get_closest_event(events, 2, 3, datetime(2020, 1, 2)) is None
+    assert res["_id"].tolist()[0] == 0
+    assert pd.isna(res["_id"][1]) and pd.isna(res["distance"][1])
+
+
 def test_unify_dates():
     dates = ['2020-01-01', '2020-01-02', '2020-01-04', '2020-01-07']
     dates = list(map(pd.to_datetime, dates))
@@ -86,4 +128,68 @@ def test_dates_to_ordinal_with_values_should_work_with_pd_series():
 
     ords, vals = dates_to_ordinal_with_values(dates, values, drop_duplicates=True)
     assert ords == [0, 1, 2]
-    assert vals == [1, 2, 4]
\ No newline at end of file
+    assert vals == [1, 2, 4]
+
+def test_dates_to_ordinal_datetime64_fast_path():
+    dates = pd.Series(pd.to_datetime(['2021-01-03 08:00', '2021-01-01 23:59', '2021-01-02 00:00']))
+    assert dates_to_ordinal(dates) == [2, 0, 1]
+    assert dates_to_ordinal(pd.DatetimeIndex(dates)) == [2, 0, 1]
+    assert dates_to_ordinal(dates.to_numpy()) == [2, 0, 1]
+
+
+def test_dates_to_ordinal_tz_aware_uses_local_day():
+    # 23:30 in Madrid is already the next day in UTC
+    dates = pd.Series(pd.to_datetime(['2021-01-01 23:30', '2021-01-02 08:00'])).dt.tz_localize('Europe/Madrid')
+    assert dates_to_ordinal(dates) == [0, 1]
+    assert dates_to_ordinal(list(dates)) == [0, 1]
+
+
+def test_dates_to_ordinal_with_values_keeps_input_order():
+    dates = pd.Series(pd.to_datetime(['2021-01-03', '2021-01-01', '2021-01-03', '2021-01-02']))
+    values = [1, 2, 3, 4]
+
+    res = dates_to_ordinal_with_values(dates, values, drop_duplicates=True)
+    assert res == ([2, 0, 1], [1, 2, 4])
+
+
+def test_dates_to_ordinal_grouped():
+    df = pd.DataFrame({
+        'pid': [1, 1, 2, 2],
+        '_dt': pd.to_datetime(['2020-01-03 00:00', '2020-01-01 23:00', '2020-01-05 00:00', '2020-01-02 10:00']),
+    })
+    assert dates_to_ordinal_grouped(df).tolist() == [2, 0, 3, 0]
+
+
+intervals = pd.DataFrame({
+    'pid': [1, 1, 2],
+    'start_dt': pd.to_datetime(['2020-01-01 10:00', '2020-01-02 08:00', '2020-01-05 00:00']),
+    'end_dt': pd.to_datetime(['2020-01-03 09:00', '2020-01-04 12:00', '2020-01-05 23:00']),
+})
+
+
+def test_df_fill_period():
+    res = df_fill_period(intervals)
+    assert res[0] == datetime(2020, 1, 1, 10)
+    assert res[-1] == datetime(2020, 1, 5)
+    assert len(res) == len(set(res))
+
+
+def test_expand_days():
+    res = expand_days(intervals)
+    assert res.pid.tolist() == [1, 1, 1, 1, 2]
+    assert res.day.tolist() == list(pd.to_datetime(['2020-01-01', '2020-01-02', '2020-01-03', '2020-01-04', '2020-01-05']))
+
+    res = expand_days(intervals, dedupe=False)
+    assert len(res) == 7
+
+
+def test_expand_days_as_presence():
+    df = pd.DataFrame({
+        'pid': [1, 1],
+        'start_dt': pd.to_datetime(['2020-01-01', '2020-01-05']),
+        'end_dt': pd.to_datetime(['2020-01-02', '2020-01-05']),
+    })
+    res = expand_days(df, as_presence=True)
+
+    assert res.loc[1, 'first_day'] == pd.Timestamp('2020-01-01')
+    assert res.loc[1, 'presence'].tolist() == [True, True, False, False, True]
@@ -1,4 +1,4 @@
-from libds.periods import delete_period
+from libds.periods import compute_periods, delete_period
 from copy import deepcopy
 
 # TFTT
@@ -54,4 +54,18 @@ def test_delete2():
     assert res['intervals'] == [0, 5]
     assert res['durations'] == [1,1]
     assert res['starts'] == [0,6]
-    assert res['ends'] == [0,6]
\ No newline at end of file
+    assert res['ends'] == [0,6]
+
+def test_keeps_days_and_max_consec_days():
+    periods = compute_periods([c == 'T' for c in 'FTTTFFTF'])
+    res = delete_period(periods, 0)
+
+    assert res == {
+        'days': 4,
+        'periods': 1,
+        'max_consec_days': 3,
+        'intervals': [6],
+        'durations': [1],
+        'starts': [6],
+        'ends': [6],
+    }
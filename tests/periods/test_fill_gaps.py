@@ -1,4 +1,7 @@
-from libds.periods import fill_gaps
+import numpy as np
+import pandas as pd
+
+from libds.periods import fill_gaps, fill_gaps_grouped
 
 def test_returns_2_lists():
     r1, r2 = fill_gaps(list(), list())
@@ -47,3 +50,37 @@ def test_fill_gaps_true_between_threshold():
 
     assert (o == [it for it in range(0, 11)])
     assert (v == [False, True, True, True, False, True, False, False, False, True, False])
+
+
+def test_fill_gaps_last_and_always_modes():
+    ordinals = [0, 3, 4]
+    values = [5, 7, 8]
+
+    assert fill_gaps(ordinals, values, mode="last") == ([0, 1, 2, 3, 4], [5, 5, 5, 7, 8])
+    assert fill_gaps(ordinals, values, mode="always_false")[1] == [5, False, False, 7, 8]
+    assert fill_gaps(ordinals, values, mode="always_true")[1] == [5, True, True, 7, 8]
+
+    # Filled days stay bools next to int values
+    for mode in ["always_false", "always_true", "true_between"]:
+        _, v = fill_gaps(ordinals, values, mode=mode)
+        assert [type(x) for x in v] == [int, bool, bool, int, int]
+
+
+def test_fill_gaps_as_array():
+    o, v = fill_gaps([0, 2], [True, True], as_array=True)
+    assert isinstance(o, np.ndarray)
+    assert o.tolist() == [0, 1, 2]
+    assert v.tolist() == [True, True, True]
+
+
+def test_fill_gaps_grouped():
+    df = pd.DataFrame({
+        'pid': [2, 1, 1, 2],
+        'ordinal': [0, 3, 0, 2],
+        'value': [True, True, True, False],
+    })
+    res = fill_gaps_grouped(df)
+
+    assert res.pid.tolist() == [1, 1, 1, 1, 2, 2, 2]
+    assert res.ordinal.tolist() == [0, 1, 2, 3, 0, 1, 2]
+    assert res.value.tolist() == [True, True, True, True, True, False, False]
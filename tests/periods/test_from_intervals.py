@@ -0,0 +1,47 @@
+import pandas as pd
+
+from libds.periods import (compute_periods, compute_periods_from_intervals, compute_periods_from_intervals_grouped,
+                           expand_days)
+
+df = pd.DataFrame({
+    'pid': [1, 1, 1, 2, 2],
+    'start_dt': pd.to_datetime(['2020-01-01 10:00', '2020-01-02 08:00', '2020-01-06 00:00',
+                                '2020-01-05 00:00', '2020-01-06 12:00']),
+    'end_dt': pd.to_datetime(['2020-01-03 09:00', '2020-01-02 12:00', '2020-01-06 23:00',
+                              '2020-01-05 23:00', '2020-01-20 08:00']),
+})
+
+
+def test_merges_overlaps():
+    res = compute_periods_from_intervals(df[df.pid == 1])
+
+    assert res['days'] == 4
+    assert res['periods'] == 2
+    assert res['intervals'] == [0, 2]
+    assert res['starts'] == [0, 5]
+    assert res['ends'] == [2, 5]
+
+
+def test_accepts_pairs():
+    pairs = [(pd.Timestamp('2020-01-01'), pd.Timestamp('2020-01-02')),
+             (pd.Timestamp('2020-01-03'), pd.Timestamp('2020-01-03'))]
+    res = compute_periods_from_intervals(pairs, prefix='adm_', interval_stats=False)
+
+    assert res == {'adm_days': 3, 'adm_periods': 1, 'adm_max_consec_days': 3}
+
+
+def test_matches_day_expansion():
+    presence = expand_days(df, as_presence=True)
+    res, periods = compute_periods_from_intervals_grouped(df, return_periods=True)
+
+    for pid in [1, 2]:
+        expected = compute_periods(presence.loc[pid, 'presence'])
+        assert res.loc[pid].tolist() == [expected['days'], expected['periods'], expected['max_consec_days']]
+        assert periods.loc[periods.pid == pid, 'start'].tolist() == expected['starts']
+        assert periods.loc[periods.pid == pid, 'end'].tolist() == expected['ends']
+
+
+def test_empty():
+    res = compute_periods_from_intervals(df.iloc[:0])
+    assert res['periods'] == 0
+    assert res['max_consec_days'] == 0
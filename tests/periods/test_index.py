@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from libds.periods import PatientIndex, PatientIntervalIndex, find_interval_by_date
+
+df = pd.DataFrame({
+    '_id': [10, 11, 12, 13, 14],
+    'pid': [1, 1, 1, 2, 2],
+    'start_dt': pd.to_datetime(['2020-01-10', '2020-01-01', '2020-02-01', '2020-01-01', '2020-01-03']),
+    'end_dt': pd.to_datetime(['2020-01-20', '2020-01-05', '2020-02-10', '2020-01-10', '2020-01-04']),
+})
+index = PatientIntervalIndex(df)
+
+
+def test_find():
+    res = index.find(pd.Timestamp('2020-01-15'), 1)
+    assert res['_id'] == 10
+    assert res.name == 0
+
+    assert index.find(pd.Timestamp('2020-01-07'), 1, strict=False) is None
+    assert index.find(pd.Timestamp('2020-01-07'), 3, strict=False) is None
+
+
+def test_find_strict():
+    with pytest.raises(AssertionError):
+        index.find(pd.Timestamp('2020-01-07'), 1)
+
+    # Overlapping intervals
+    with pytest.raises(AssertionError):
+        index.find(pd.Timestamp('2020-01-03'), 2)
+
+
+def test_find_interval_by_date_accepts_index():
+    assert find_interval_by_date(index, pd.Timestamp('2020-02-10'), 1)['_id'] == 12
+    assert find_interval_by_date(index, pd.Timestamp('2020-01-03'), 2, strict=False)['_id'] == 13
+
+
+def test_positions():
+    pids = [1, 1, 2, 2, 3]
+    dts = pd.to_datetime(['2020-01-01', '2020-01-07', '2020-01-03', '2020-01-05', '2020-01-05'])
+
+    assert index.positions(pids, dts, strict=False).tolist() == [1, -1, 3, 3, -1]
+
+    counts, _ = index.search(pids, dts)
+    assert counts.tolist() == [1, 0, 2, 1, 0]
+
+
+events = pd.DataFrame({
+    'pid': [2, 1, 1, 2, 1, 1],
+    '_dt': pd.to_datetime(['2020-01-02', '2020-01-05', '2020-01-01', '2020-01-01', None, '2020-01-05']),
+    'value': [1, 2, 3, 4, 5, 6],
+})
+
+
+def test_patient_index():
+    patients = PatientIndex(events)
+
+    assert len(patients) == 6
+    assert patients.pids.tolist() == [1, 2]
+    assert patients.offsets.tolist() == [0, 4, 6]
+    assert patients.df.value.tolist() == [5, 3, 2, 6, 4, 1]
+    assert 1 in patients and 3 not in patients
+
+
+def test_patient_index_windows():
+    patients = PatientIndex(events)
+
+    assert patients.patient(1).value.tolist() == [5, 3, 2, 6]
+    assert patients.patient(1, end_dt=pd.Timestamp('2020-01-05')).value.tolist() == [3, 2, 6]
+    assert patients.patient(1, end_dt=pd.Timestamp('2020-01-05'), inclusive=False).value.tolist() == [3]
+    assert patients.patient(1, pd.Timestamp('2020-01-02'), pd.Timestamp('2020-01-31')).value.tolist() == [2, 6]
+    assert patients.patient(2, pd.Timestamp('2020-01-03')).empty
+    assert patients.patient(1, pd.NaT, pd.Timestamp('2020-01-31')).empty
+    assert patients.patient(3).empty
+
+    values = patients.values('value', 2, end_dt='2020-01-01')
+    assert isinstance(values, np.ndarray)
+    assert values.tolist() == [4]
+
+
+def test_patient_index_matches_filter(random_events):
+    rng = np.random.default_rng(0)
+    df = random_events(rng, 1000, 20)
+    patients = PatientIndex(df)
+
+    for _ in range(50):
+        pid = rng.integers(0, 22)
+        start_dt = pd.Timestamp('2020-01-01') + pd.Timedelta(hours=int(rng.integers(0, 90 * 24)))
+        end_dt = start_dt + pd.Timedelta(days=int(rng.integers(0, 20)))
+
+        expected = df[(df.pid == pid) & (df._dt >= start_dt) & (df._dt <= end_dt)].sort_values('_dt', kind='stable')
+        pd.testing.assert_frame_equal(patients.patient(pid, start_dt, end_dt), expected)
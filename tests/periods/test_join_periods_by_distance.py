@@ -1,4 +1,5 @@
-from libds.periods import compute_periods, join_periods_by_distance, delete_period
+from libds.periods import (Periods, compute_periods, join_periods_by_distance, join_periods_by_distance_batch,
+                           delete_period)
 
 def makebool(s):
     return [ True if x == 'T' else False for x in s ]
@@ -45,4 +46,43 @@ def test_antonio_scenario():
     if res['intervals'][0] < 3:
         res = delete_period(res, 0)
 
-    assert res['periods'] == 2
\ No newline at end of file
+    assert res['periods'] == 2
+
+def test_periods_object():
+    periods = Periods.from_dict(compute_periods(makebool('FTTFTFFTTFTTTF')))
+    res = join_periods_by_distance(periods, 1)
+
+    assert isinstance(res, Periods)
+    assert res['periods'] == 2
+    assert res['starts'].tolist() == [1, 7]
+    assert res['ends'].tolist() == [4, 12]
+
+
+def test_batch():
+    patients = [makebool('FTTFTFFTTFTTTF'), makebool('FFFF'), makebool('TFFTFT')]
+    periods = [compute_periods(p) for p in patients]
+    offsets = [0, 4, 4, 7]
+    arrays = [sum((p[key] for p in periods), []) for key in ('intervals', 'durations', 'starts', 'ends')]
+
+    offsets, intervals, durations, starts, ends = join_periods_by_distance_batch(offsets, *arrays, 1)
+
+    assert offsets.tolist() == [0, 2, 2, 4]
+    assert starts.tolist() == [1, 7, 0, 3]
+    assert ends.tolist() == [4, 12, 0, 5]
+    assert durations.tolist() == [4, 6, 1, 3]
+    assert intervals.tolist() == [1, 2, 0, 2]
+
+
+def test_keeps_days_and_max_consec_days():
+    periods = compute_periods(makebool('FTTTFFTF'))
+    res = join_periods_by_distance(periods, 2)
+
+    assert res == {
+        'days': 4,
+        'periods': 1,
+        'max_consec_days': 3,
+        'intervals': [1],
+        'durations': [6],
+        'starts': [1],
+        'ends': [6],
+    }
@@ -0,0 +1,73 @@
+import numpy as np
+
+from libds.periods import Periods, compute_periods, join_specific_periods, delete_period
+
+
+def makebool(s):
+    return [ True if x == 'T' else False for x in s ]
+
+# TFTTFFT
+p2 = dict(
+    days=4,
+    periods=3,
+    intervals=[0, 1, 2],
+    durations=[1, 2, 1],
+    starts=[0, 2, 6],
+    ends=[0, 3, 6]
+)
+
+
+def test_dict_access():
+    p = Periods.from_dict(p2)
+
+    assert p['periods'] == 3
+    assert p['days'] == 4
+    assert p['max_consec_days'] == 2
+    assert p['durations'].tolist() == [1, 2, 1]
+    assert set(p.keys()) == {'days', 'periods', 'max_consec_days', 'intervals', 'durations', 'starts', 'ends'}
+    assert len(p) == len(list(p)) == 7
+    assert p.values()[:3] == [4, 3, 2]
+    assert dict(p.items())['periods'] == p.periods == 3
+    assert p.to_dict() == compute_periods(makebool('TFTTFFT'))
+
+
+def test_uses_slots():
+    p = Periods.from_dict(p2)
+    try:
+        p.other = 1
+        assert False  # Should not reach here
+    except AttributeError:
+        pass
+
+
+def test_join_and_delete_match_functions():
+    p = Periods.from_dict(p2)
+
+    assert p.join(0).to_dict() == join_specific_periods(p2, 0) | {'max_consec_days': 2}
+    assert p.delete(1).to_dict() == delete_period(p2, 1) | {'max_consec_days': 2}
+    assert isinstance(join_specific_periods(p, 1), Periods)
+
+
+def test_merge():
+    res = Periods.from_dict(p2).merge([False, True, True])
+
+    assert res.periods == 1
+    assert res['durations'].tolist() == [7]
+    assert res['starts'].tolist() == [0]
+    assert res['ends'].tolist() == [6]
+
+
+def test_filter():
+    res = Periods.from_dict(p2).filter(np.array([False, True, False]))
+
+    assert res.periods == 1
+    assert res['intervals'].tolist() == [2]
+    assert res['starts'].tolist() == [2]
+
+
+def test_out_of_bounds():
+    try:
+        Periods.from_dict(p2).join(2)
+        assert False  # Should not reach here
+    except IndexError as e:
+        assert str(e) == 'period index out of range'
@@ -1,5 +1,7 @@
+import numpy as np
 import pandas as pd
-from libds.intervals import intervals_select_by_interval, contains_interval
+from libds.intervals import intervals_select_by_interval, contains_interval, overlap_join
+from libds.periods import PatientIntervalIndex
 
 
 def test_intervals_select_by_interval():
@@ -58,3 +60,59 @@ def test_contains_interval():
 
     res = contains_interval(df, 1, "2020-01-08", "2020-01-11", contained=False)
     assert res == True
+
+
+def test_intervals_select_by_interval_index(random_windows):
+    rng = np.random.default_rng(0)
+    df = random_windows(rng, 300, 5, days=300, max_days=30)
+    df.index = rng.permutation(len(df)) * 2
+    index = PatientIntervalIndex(df)
+    queries = random_windows(rng, 50, 6, days=300, max_days=20)
+
+    for contained in [False, True]:
+        for row in queries.itertuples():
+            expected = intervals_select_by_interval(df, row.pid, row.start_dt, row.end_dt, contained)
+            res = intervals_select_by_interval(index, row.pid, row.start_dt, row.end_dt, contained)
+            pd.testing.assert_frame_equal(res, expected)
+
+    assert contains_interval(index, 1, "2020-01-01", "2020-12-31")
+    assert not contains_interval(index, 10, "2020-01-01", "2020-12-31")
+
+
+def test_overlap_join():
+    left = pd.DataFrame({
+        'pid': [1, 1, 2, 3],
+        'start_dt': ['2020-01-02', '2020-01-08', '2020-01-01', '2020-01-01'],
+        'end_dt':   ['2020-01-04', '2020-01-11', '2020-01-30', '2020-01-30'],
+    }, index=['a', 'b', 'c', 'd'])
+    right = pd.DataFrame({
+        'pid': [1, 1, 1, 2, 2],
+        'start_dt': ['2020-01-01', '2020-01-07', '2020-01-10', '2020-01-05', '2020-01-01'],
+        'end_dt':   ['2020-01-03', '2020-01-09', '2020-01-11', '2020-01-22', '2020-02-22'],
+    }, index=[10, 11, 12, 13, 14])
+    for df in [left, right]:
+        df["start_dt"] = pd.to_datetime(df["start_dt"])
+        df["end_dt"] = pd.to_datetime(df["end_dt"])
+
+    res = overlap_join(left, right)
+    assert res.left.tolist() == ['a', 'b', 'b', 'c', 'c']
+    assert res.right.tolist() == [10, 11, 12, 13, 14]
+
+    res = overlap_join(left, PatientIntervalIndex(right), contained=True)
+    assert res.left.tolist() == ['b', 'c']
+    assert res.right.tolist() == [12, 13]
+
+
+def test_overlap_join_matches_select(random_windows):
+    rng = np.random.default_rng(1)
+    right = random_windows(rng, 400, 8, days=300, max_days=30)
+    left = random_windows(rng, 100, 9, days=300, max_days=20)
+
+    for contained in [False, True]:
+        res = overlap_join(left, right, contained)
+        expected = [
+            (i, j)
+            for i, row in left.iterrows()
+            for j in intervals_select_by_interval(right, row.pid, row.start_dt, row.end_dt, contained).index
+        ]
+        assert list(zip(res.left, res.right)) == expected